@@ -4,9 +4,10 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # Import from our modular source files
-from src.models import load_models, analyze_text
+from src.models import analyze_text, check_quantization_agreement
+from src.ui import get_models
 from src.visualization import create_emotion_chart, create_sarcasm_gauge, create_vader_chart
-from src.utils import get_emotion_emoji, load_dataset_tweets, generate_random_tweets
+from src.utils import get_emotion_emoji, sample_dataset_tweets
 from src.explainability import explain_with_lime, explain_with_shap
 
 # Import page functions
@@ -469,7 +470,7 @@ def main():
     # Load models
     if not st.session_state.models_loaded:
         with st.spinner("🔮 Loading AI models... This may take a moment..."):
-            models = load_models()
+            models = get_models()
             if models:
                 st.session_state.models = models
                 st.session_state.models_loaded = True
@@ -479,6 +480,32 @@ def main():
     else:
         models = st.session_state.models
     
+    if models.get('prediction_cache') is not None:
+        with st.sidebar.expander("🗄️ Prediction Cache"):
+            stats = models['prediction_cache'].stats()
+            st.caption(
+                f"Hits: {stats['hits']:,} (disk {stats['disk_hits']:,}) • Misses: {stats['misses']:,} • "
+                f"Hit rate: {stats['hit_rate']:.1%}"
+            )
+            st.caption(
+                f"Entries: {stats['entries']:,} ({stats['bytes'] / 1e6:.1f} MB) • Disk: {stats['disk_entries']:,} • "
+                f"Evictions: {stats['evictions']:,}"
+            )
+    
+    if models.get('quantized'):
+        with st.sidebar.expander("⚖️ Int8 Quantization"):
+            if st.button("Check agreement vs fp32", use_container_width=True):
+                with st.spinner("Comparing int8 and fp32 predictions..."):
+                    reference_texts = sample_dataset_tweets(200)
+                    st.session_state.quantization_report = check_quantization_agreement(reference_texts, models)
+            report = st.session_state.get('quantization_report')
+            if report:
+                st.caption(
+                    f"{report['n_texts']} texts • Sarcasm flips: {report['sarcasm_flip_rate']:.1%} "
+                    f"(max Δp {report['sarcasm_max_prob_delta']:.3f}) • Emotion top-1 flips: "
+                    f"{report['emotion_top_flip_rate']:.1%} (max Δp {report['emotion_max_prob_delta']:.3f})"
+                )
+    
     # Page routing
     if page == "🏠 Home":
         show_home_page()
@@ -489,7 +516,7 @@ def main():
     elif page == "🔍 Explainability":
         show_explainability_page(models)
     elif page == "📈 Dataset Explorer":
-        show_dataset_explorer_page(models)
+        show_dataset_explorer_page(models, show_vader, show_emotions)
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,34 @@
+import os
+import uuid
 import streamlit as st
 import pandas as pd
-from src.models import analyze_text
-from src.utils import get_emotion_emoji, load_dataset_tweets, generate_random_tweets
+from src import config
+from src.datasets import frame_to_parquet_bytes
+from src.models import analyze_batch, select_components
+from src.results import results_to_frame, summarize_results, format_results_table
+from src.streaming import analyze_csv_stream, prune_stream_results
+from src.ui import report_errors, get_job_manager
+from src.utils import get_emotion_emoji, sample_dataset_tweets
+
+BATCH_SIZE = 16
+
+def analyze_to_frame(texts, models, components, progress_bar):
+    """Analyze texts in batches into a typed results table, updating the progress bar"""
+    frames = []
+    for start in range(0, len(texts), BATCH_SIZE):
+        chunk = texts[start:start + BATCH_SIZE]
+        batch_results = analyze_batch(chunk, models, BATCH_SIZE, components)
+        report_errors(batch_results)
+        frames.append(results_to_frame(chunk, batch_results))
+        progress_bar.progress(min(start + BATCH_SIZE, len(texts)) / len(texts))
+    return pd.concat(frames, ignore_index=True)
 
 def show_batch_analysis_page(models, show_vader, show_emotions):
+    components = select_components(show_emotions, show_vader)
     st.markdown("<h2 style='font-size: 42px;'>📊 Batch Tweet Analysis</h2>", unsafe_allow_html=True)
     st.markdown("<br>", unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["🎲 Random Tweets", "✍️ Custom Tweets", "📁 CSV Upload"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🎲 Random Tweets", "✍️ Custom Tweets", "📁 CSV Upload", "🗂️ Background Jobs"])
     
     with tab1:
         st.markdown("<h3 style='font-size: 28px;'>Generate Random Tweets from Dataset</h3>", unsafe_allow_html=True)
@@ -19,8 +40,7 @@ def show_batch_analysis_page(models, show_vader, show_emotions):
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("🎲 Generate", use_container_width=True, key='gen_random'):
-                df = load_dataset_tweets()
-                st.session_state.random_tweets = generate_random_tweets(df, n_tweets)
+                st.session_state.random_tweets = sample_dataset_tweets(n_tweets)
         
         if st.session_state.random_tweets:
             st.markdown(f"<h4 style='font-size: 24px;'>📝 Generated {len(st.session_state.random_tweets)} Tweets</h4>", unsafe_allow_html=True)
@@ -39,39 +59,26 @@ def show_batch_analysis_page(models, show_vader, show_emotions):
                 progress_bar = st.progress(0)
                 st.markdown("<h4 style='font-size: 24px;'>⚡ Analyzing tweets...</h4>", unsafe_allow_html=True)
                 
-                results_list = []
-                
-                for idx, tweet in enumerate(st.session_state.random_tweets):
-                    results = analyze_text(tweet, models)
-                    results_list.append({
-                        'Tweet': tweet[:100] + '...' if len(tweet) > 100 else tweet,
-                        'Sarcasm': results['sarcasm']['label'],
-                        'Confidence': f"{results['sarcasm']['confidence']:.1%}",
-                        'Top Emotion': f"{get_emotion_emoji(results['emotions'][0]['label'])} {results['emotions'][0]['label']}",
-                        'Emotion Score': f"{results['emotions'][0]['score']:.1%}",
-                        'VADER': f"{results['vader']['compound']:.3f}"
-                    })
-                    progress_bar.progress((idx + 1) / len(st.session_state.random_tweets))
+                results_frame = analyze_to_frame(st.session_state.random_tweets, models, components, progress_bar)
+                summary = summarize_results(results_frame)
                 
                 st.markdown("<h3 style='font-size: 32px;'>📊 Analysis Results</h3>", unsafe_allow_html=True)
-                results_df = pd.DataFrame(results_list)
-                st.dataframe(results_df, use_container_width=True, height=400)
+                st.dataframe(format_results_table(results_frame), use_container_width=True, height=400)
                 
                 st.markdown("<h4 style='font-size: 24px;'>📈 Summary Statistics</h4>", unsafe_allow_html=True)
                 col1, col2, col3, col4 = st.columns(4)
                 
-                sarcastic_count = sum(1 for r in results_list if r['Sarcasm'] == 'Sarcastic')
                 with col1:
                     st.markdown(f"""
                     <div class='metric-card' style='text-align: center;'>
                         <h4 style='font-size: 18px;'>Sarcastic Tweets</h4>
-                        <p style='font-size: 32px !important; color: #f72585 !important; font-weight: 700;'>{sarcastic_count}/{len(results_list)}</p>
-                        <p style='font-size: 18px !important;'>({sarcastic_count/len(results_list):.1%})</p>
+                        <p style='font-size: 32px !important; color: #f72585 !important; font-weight: 700;'>{summary['sarcastic_count']}/{summary['n']}</p>
+                        <p style='font-size: 18px !important;'>({summary['sarcastic_rate']:.1%})</p>
                     </div>
                     """, unsafe_allow_html=True)
                 
                 with col2:
-                    avg_conf = sum(float(r['Confidence'].strip('%'))/100 for r in results_list) / len(results_list)
+                    avg_conf = summary['avg_confidence']
                     st.markdown(f"""
                     <div class='metric-card' style='text-align: center;'>
                         <h4 style='font-size: 18px;'>Avg Confidence</h4>
@@ -80,26 +87,31 @@ def show_batch_analysis_page(models, show_vader, show_emotions):
                     """, unsafe_allow_html=True)
                 
                 with col3:
-                    avg_vader = sum(float(r['VADER']) for r in results_list) / len(results_list)
-                    vader_color = '#00d4ff' if avg_vader > 0 else ('#f72585' if avg_vader < 0 else '#7b2ff7')
-                    st.markdown(f"""
-                    <div class='metric-card' style='text-align: center;'>
-                        <h4 style='font-size: 18px;'>Avg VADER</h4>
-                        <p style='font-size: 32px !important; color: {vader_color} !important; font-weight: 700;'>{avg_vader:.3f}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    if show_vader:
+                        avg_vader = summary['avg_vader']
+                        vader_color = '#00d4ff' if avg_vader > 0 else ('#f72585' if avg_vader < 0 else '#7b2ff7')
+                        st.markdown(f"""
+                        <div class='metric-card' style='text-align: center;'>
+                            <h4 style='font-size: 18px;'>Avg VADER</h4>
+                            <p style='font-size: 32px !important; color: {vader_color} !important; font-weight: 700;'>{avg_vader:.3f}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
                 with col4:
-                    emotions = [r['Top Emotion'].split()[-1] for r in results_list]
-                    most_common = max(set(emotions), key=emotions.count)
-                    emoji = get_emotion_emoji(most_common)
-                    st.markdown(f"""
-                    <div class='metric-card' style='text-align: center;'>
-                        <div style='font-size: 36px;'>{emoji}</div>
-                        <h4 style='font-size: 18px;'>Top Emotion</h4>
-                        <p style='font-size: 20px !important; color: #7b2ff7 !important; font-weight: 700;'>{most_common.title()}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    if show_emotions:
+                        most_common = summary['top_emotion']
+                        emoji = get_emotion_emoji(most_common)
+                        st.markdown(f"""
+                        <div class='metric-card' style='text-align: center;'>
+                            <div style='font-size: 36px;'>{emoji}</div>
+                            <h4 style='font-size: 18px;'>Top Emotion</h4>
+                            <p style='font-size: 20px !important; color: #7b2ff7 !important; font-weight: 700;'>{most_common.title()}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+                
+                if show_emotions:
+                    st.markdown("<h4 style='font-size: 24px;'>🎭 Average Emotion Scores</h4>", unsafe_allow_html=True)
+                    st.bar_chart(summary['emotion_means'].head(10))
                 
                 # Add explainability prompt
                 st.markdown("<br>", unsafe_allow_html=True)
@@ -127,23 +139,10 @@ def show_batch_analysis_page(models, show_vader, show_emotions):
             
             if tweets:
                 progress_bar = st.progress(0)
-                results_list = []
-                
-                for idx, tweet in enumerate(tweets[:20]):
-                    results = analyze_text(tweet, models)
-                    results_list.append({
-                        'Tweet': tweet[:100] + '...' if len(tweet) > 100 else tweet,
-                        'Sarcasm': results['sarcasm']['label'],
-                        'Confidence': f"{results['sarcasm']['confidence']:.1%}",
-                        'Top Emotion': f"{get_emotion_emoji(results['emotions'][0]['label'])} {results['emotions'][0]['label']}",
-                        'Emotion Score': f"{results['emotions'][0]['score']:.1%}",
-                        'VADER': f"{results['vader']['compound']:.3f}"
-                    })
-                    progress_bar.progress((idx + 1) / min(len(tweets), 20))
+                results_frame = analyze_to_frame(tweets[:20], models, components, progress_bar)
                 
                 st.markdown("<h3 style='font-size: 32px;'>📊 Analysis Results</h3>", unsafe_allow_html=True)
-                results_df = pd.DataFrame(results_list)
-                st.dataframe(results_df, use_container_width=True, height=400)
+                st.dataframe(format_results_table(results_frame), use_container_width=True, height=400)
     
     with tab3:
         st.markdown("<h3 style='font-size: 28px;'>Upload CSV File</h3>", unsafe_allow_html=True)
@@ -151,39 +150,141 @@ def show_batch_analysis_page(models, show_vader, show_emotions):
         uploaded_file = st.file_uploader("Choose a CSV file", type=['csv'])
         
         if uploaded_file:
-            df = pd.read_csv(uploaded_file)
-            st.markdown(f"<p style='font-size: 20px !important; color: #00d4ff !important;'><b>✅ Loaded {len(df):,} rows</b></p>", unsafe_allow_html=True)
+            columns = pd.read_csv(uploaded_file, nrows=0).columns.tolist()
+            uploaded_file.seek(0)
+            st.markdown(f"<p style='font-size: 20px !important; color: #00d4ff !important;'><b>✅ Uploaded {uploaded_file.size / 1e6:,.1f} MB</b></p>", unsafe_allow_html=True)
             
-            text_col = st.selectbox("Select text column:", df.columns.tolist())
-            n_samples = st.slider("Number of samples to analyze", 5, min(50, len(df)), 10)
+            text_col = st.selectbox("Select text column:", columns)
+            mode = st.radio("Analysis mode", ["🎯 Sample rows", "🌊 Stream entire file"], horizontal=True)
             
-            if st.button("🔍 Analyze CSV", type="primary", key='analyze_csv'):
-                sample_df = df.sample(n=n_samples)
-                progress_bar = st.progress(0)
-                results_list = []
+            if mode == "🌊 Stream entire file":
+                if st.button("🔍 Analyze Entire CSV", type="primary", key='analyze_csv_stream'):
+                    streams_dir = os.path.join(config.CACHE_DIR, 'streams')
+                    # Only the latest run of a session is kept; abandoned ones expire by age
+                    previous_path = st.session_state.pop('stream_result_path', None)
+                    if previous_path and os.path.exists(previous_path):
+                        os.remove(previous_path)
+                    prune_stream_results(streams_dir)
+                    output_path = os.path.join(streams_dir, f"{uuid.uuid4().hex}.csv")
+                    progress_bar = st.progress(0)
+                    status = st.empty()
+                    preview = st.empty()
+                    
+                    for progress in analyze_csv_stream(uploaded_file, text_col, models, output_path,
+                                                       batch_size=BATCH_SIZE, components=components,
+                                                       total_bytes=uploaded_file.size):
+                        report_errors(progress['results'])
+                        if progress['fraction'] is not None:
+                            progress_bar.progress(progress['fraction'])
+                        eta = f" • ETA {progress['eta']:,.0f}s" if progress['eta'] is not None else ""
+                        status.markdown(
+                            f"<p style='font-size: 18px !important; color: #e8f0ff !important;'>⚡ {progress['rows']:,} rows • "
+                            f"{progress['rows_per_sec']:,.1f} rows/s • {progress['elapsed']:,.0f}s elapsed{eta}</p>",
+                            unsafe_allow_html=True
+                        )
+                        preview.dataframe(format_results_table(
+                            results_to_frame(progress['texts'][-10:], progress['results'][-10:])
+                        ), use_container_width=True)
+                    
+                    progress_bar.progress(1.0)
+                    st.session_state.stream_result_path = output_path
                 
-                for idx, row in enumerate(sample_df.iterrows()):
-                    text = str(row[1][text_col])
-                    results = analyze_text(text, models)
-                    results_list.append({
-                        'Tweet': text[:100] + '...' if len(text) > 100 else text,
-                        'Sarcasm': results['sarcasm']['label'],
-                        'Confidence': f"{results['sarcasm']['confidence']:.1%}",
-                        'Top Emotion': f"{get_emotion_emoji(results['emotions'][0]['label'])} {results['emotions'][0]['label']}",
-                        'Emotion Score': f"{results['emotions'][0]['score']:.1%}",
-                        'VADER': f"{results['vader']['compound']:.3f}"
-                    })
-                    progress_bar.progress((idx + 1) / n_samples)
+                if st.session_state.get('stream_result_path') and os.path.exists(st.session_state.stream_result_path):
+                    with open(st.session_state.stream_result_path, 'rb') as f:
+                        st.download_button(
+                            "📥 Download Full Results",
+                            f,
+                            "analysis_results.csv",
+                            "text/csv",
+                            key='download-stream-csv'
+                        )
+            
+            else:
+                df = pd.read_csv(uploaded_file)
+                st.markdown(f"<p style='font-size: 20px !important; color: #00d4ff !important;'><b>✅ Loaded {len(df):,} rows</b></p>", unsafe_allow_html=True)
+                n_samples = st.slider("Number of samples to analyze", 5, min(50, len(df)), 10)
                 
-                st.markdown("<h3 style='font-size: 32px;'>📊 Analysis Results</h3>", unsafe_allow_html=True)
-                results_df = pd.DataFrame(results_list)
-                st.dataframe(results_df, use_container_width=True, height=400)
+                if st.button("🔍 Analyze CSV", type="primary", key='analyze_csv'):
+                    sample_df = df.sample(n=n_samples)
+                    progress_bar = st.progress(0)
+                    results_frame = analyze_to_frame(sample_df[text_col].astype(str).tolist(), models, components, progress_bar)
+                    
+                    st.markdown("<h3 style='font-size: 32px;'>📊 Analysis Results</h3>", unsafe_allow_html=True)
+                    st.dataframe(format_results_table(results_frame), use_container_width=True, height=400)
+                    
+                    csv = results_frame.to_csv(index=False)
+                    dl_col1, dl_col2 = st.columns(2)
+                    with dl_col1:
+                        st.download_button(
+                            "📥 Download Results",
+                            csv,
+                            "analysis_results.csv",
+                            "text/csv",
+                            key='download-csv'
+                        )
+                    with dl_col2:
+                        st.download_button(
+                            "📥 Download Parquet",
+                            frame_to_parquet_bytes(results_frame),
+                            "analysis_results.parquet",
+                            "application/octet-stream",
+                            key='download-parquet'
+                        )
+    
+    with tab4:
+        st.markdown("<h3 style='font-size: 28px;'>Background Batch Jobs</h3>", unsafe_allow_html=True)
+        st.markdown("<p style='font-size: 18px !important; color: #e8f0ff !important;'>Jobs run on the server in checkpointed chunks. They keep going if you leave this page and resume after a restart.</p>", unsafe_allow_html=True)
+        
+        job_manager = get_job_manager()
+        job_file = st.file_uploader("Choose a CSV file", type=['csv'], key='job_upload')
+        
+        if job_file:
+            job_columns = pd.read_csv(job_file, nrows=0).columns.tolist()
+            job_file.seek(0)
+            job_text_col = st.selectbox("Select text column:", job_columns, key='job_text_col')
+            
+            if st.button("🚀 Submit Job", type="primary", key='submit_job'):
+                job_id = job_manager.submit(job_file, job_text_col, components, batch_size=BATCH_SIZE, name=job_file.name)
+                st.success(f"✅ Submitted job {job_id}")
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown("<h4 style='font-size: 24px;'>📋 Jobs</h4>", unsafe_allow_html=True)
+        with col2:
+            st.button("🔄 Refresh", use_container_width=True, key='refresh_jobs')
+        
+        # Pick up jobs orphaned by a crashed worker (stale lease) without a server restart
+        job_manager.resume_pending()
+        stalled = {job['id'] for job in job_manager.pending_jobs()}
+        
+        for job in job_manager.list_jobs():
+            status_icon = {'queued': '⏳', 'running': '⚙️', 'done': '✅', 'failed': '❌'}.get(job['status'], '❔')
+            with st.expander(f"{status_icon} {job['name']} • {job['status']} • {job['rows_done']:,} rows", expanded=job['status'] == 'running'):
+                st.caption(f"Job {job['id']} • {job['chunks_done']} chunks checkpointed")
+                if job['error']:
+                    st.error(job['error'])
                 
-                csv = results_df.to_csv(index=False)
-                st.download_button(
-                    "📥 Download Results",
-                    csv,
-                    "analysis_results.csv",
-                    "text/csv",
-                    key='download-csv'
-                )
+                job_col1, job_col2 = st.columns(2)
+                with job_col1:
+                    if (job['status'] == 'failed' or job['id'] in stalled) and st.button("▶️ Resume", key=f"resume_{job['id']}"):
+                        job_manager.resume(job['id'])
+                        st.rerun()
+                with job_col2:
+                    if job['rows_done'] and st.button("📥 Prepare Results", key=f"results_{job['id']}"):
+                        job_results = job_manager.results(job['id'])
+                        suffix = "" if job['status'] == 'done' else " (partial)"
+                        st.download_button(
+                            "📥 Download CSV" + suffix,
+                            job_results.to_csv(index=False),
+                            f"{job['id']}_results.csv",
+                            "text/csv",
+                            key=f"download_{job['id']}"
+                        )
+                        st.download_button(
+                            "📥 Download Parquet" + suffix,
+                            frame_to_parquet_bytes(job_results),
+                            f"{job['id']}_results.parquet",
+                            "application/octet-stream",
+                            key=f"download_parquet_{job['id']}"
+                        )
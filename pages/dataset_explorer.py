@@ -1,25 +1,48 @@
+import time
 import streamlit as st
 import pandas as pd
-from src.models import analyze_text
-from src.utils import get_emotion_emoji, load_dataset_tweets, generate_random_tweets
+import numpy as np
+from src.models import analyze_text, analyze_batch, select_components
+from src.datasets import find_dataset_path
+from src.profiling import dataset_profile
+from src.prediction_index import build_index, filter_index, is_stale, top_matches
+from src.sampling import take_rows
+from src.token_cache import dataset_token_cache
+from src.results import emotion_columns, format_results_table, results_to_frame, summarize_results
+from src.ui import get_keyword_index, get_prediction_index, report_errors
+from src.utils import get_emotion_emoji, generate_random_tweets, sample_dataset_strata, sample_dataset_tweets
 
-def show_dataset_explorer_page(models):
+def show_dataset_explorer_page(models, show_vader=True, show_emotions=True):
+    components = select_components(show_emotions, show_vader)
     st.markdown("<h2 style='font-size: 42px;'>📈 Dataset Explorer</h2>", unsafe_allow_html=True)
     st.markdown("<br>", unsafe_allow_html=True)
     
-    df = load_dataset_tweets()
+    # The dataset may not fit in memory: statistics come from the streamed
+    # profile and rows are read on demand
+    dataset_path = find_dataset_path()
+    profile = None
+    if dataset_path is not None:
+        try:
+            with st.spinner("Profiling dataset..."):
+                profile = dataset_profile(dataset_path)
+        except Exception as e:
+            print(f"❌ Error profiling dataset: {str(e)}")
     
-    if df is not None:
+    if profile is not None:
+        columns = profile['columns']
+        n_rows = profile['rows']
+        text_col = profile['text_col']
+        
         st.markdown(f"""
         <div class='prediction-box'>
             <h4 style='font-size: 24px;'>📊 Dataset Information</h4>
-            <p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #00d4ff;'>Total Records:</b> {len(df):,}</p>
-            <p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #7b2ff7;'>Columns:</b> {', '.join(df.columns.tolist())}</p>
+            <p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #00d4ff;'>Total Records:</b> {profile['rows']:,}</p>
+            <p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #7b2ff7;'>Columns:</b> {', '.join(columns)}</p>
         </div>
         """, unsafe_allow_html=True)
         
         st.markdown("<h3 style='font-size: 32px;'>📋 Sample Data</h3>", unsafe_allow_html=True)
-        st.dataframe(df.head(20), use_container_width=True, height=400)
+        st.dataframe(take_rows(dataset_path, np.arange(min(20, n_rows))), use_container_width=True, height=400)
         
         st.markdown("<h3 style='font-size: 32px;'>📊 Dataset Statistics</h3>", unsafe_allow_html=True)
         
@@ -29,7 +52,7 @@ def show_dataset_explorer_page(models):
             st.markdown(f"""
             <div class='metric-card' style='text-align: center;'>
                 <h4 style='font-size: 20px;'>Total Rows</h4>
-                <p style='font-size: 36px !important; color: #00d4ff !important; font-weight: 700;'>{len(df):,}</p>
+                <p style='font-size: 36px !important; color: #00d4ff !important; font-weight: 700;'>{profile['rows']:,}</p>
             </div>
             """, unsafe_allow_html=True)
         
@@ -37,23 +60,16 @@ def show_dataset_explorer_page(models):
             st.markdown(f"""
             <div class='metric-card' style='text-align: center;'>
                 <h4 style='font-size: 20px;'>Total Columns</h4>
-                <p style='font-size: 36px !important; color: #7b2ff7 !important; font-weight: 700;'>{len(df.columns)}</p>
+                <p style='font-size: 36px !important; color: #7b2ff7 !important; font-weight: 700;'>{len(columns)}</p>
             </div>
             """, unsafe_allow_html=True)
         
         with col3:
-            text_col = None
-            for col in ['text', 'tweet', 'content', 'message', 'Text', 'Tweet']:
-                if col in df.columns:
-                    text_col = col
-                    break
-            
-            if text_col:
-                avg_len = df[text_col].astype(str).str.len().mean()
+            if profile['avg_text_length'] is not None:
                 st.markdown(f"""
                 <div class='metric-card' style='text-align: center;'>
                     <h4 style='font-size: 20px;'>Avg Text Length</h4>
-                    <p style='font-size: 36px !important; color: #f72585 !important; font-weight: 700;'>{avg_len:.0f}</p>
+                    <p style='font-size: 36px !important; color: #f72585 !important; font-weight: 700;'>{profile['avg_text_length']:.0f}</p>
                     <p style='font-size: 18px !important;'>characters</p>
                 </div>
                 """, unsafe_allow_html=True)
@@ -65,77 +81,103 @@ def show_dataset_explorer_page(models):
                 </div>
                 """, unsafe_allow_html=True)
         
+        histogram = profile['text_length_histogram']
+        if histogram is not None:
+            st.markdown("<h4 style='font-size: 24px;'>📏 Text Length Distribution</h4>", unsafe_allow_html=True)
+            width = histogram['bin_width']
+            labels = [f"{i * width:03d}-{i * width + width - 1}" for i in range(len(histogram['counts']) - 1)]
+            labels.append(f"{(len(histogram['counts']) - 1) * width}+")
+            st.bar_chart(pd.DataFrame({'tweets': histogram['counts']}, index=labels))
+        
         st.markdown("<br><br>", unsafe_allow_html=True)
         
         st.markdown("<h3 style='font-size: 32px;'>🔍 Column Analysis</h3>", unsafe_allow_html=True)
         
-        for col in df.columns:
+        for col, stats in columns.items():
             with st.expander(f"📊 {col}", expanded=False):
-                col_info1, col_info2, col_info3 = st.columns(3)
+                col_info1, col_info2, col_info3, col_info4 = st.columns(4)
                 
                 with col_info1:
-                    st.markdown(f"<p style='font-size: 18px !important; color: #e8f0ff !important;'><b>Type:</b> {df[col].dtype}</p>", unsafe_allow_html=True)
+                    st.markdown(f"<p style='font-size: 18px !important; color: #e8f0ff !important;'><b>Type:</b> {stats['dtype']}</p>", unsafe_allow_html=True)
                 with col_info2:
-                    st.markdown(f"<p style='font-size: 18px !important; color: #00d4ff !important;'><b>Non-null:</b> {df[col].notna().sum():,}</p>", unsafe_allow_html=True)
+                    st.markdown(f"<p style='font-size: 18px !important; color: #00d4ff !important;'><b>Non-null:</b> {profile['rows'] - stats['nulls']:,}</p>", unsafe_allow_html=True)
                 with col_info3:
-                    st.markdown(f"<p style='font-size: 18px !important; color: #f72585 !important;'><b>Null:</b> {df[col].isna().sum():,}</p>", unsafe_allow_html=True)
+                    st.markdown(f"<p style='font-size: 18px !important; color: #f72585 !important;'><b>Null:</b> {stats['nulls']:,} ({stats['null_rate']:.1%})</p>", unsafe_allow_html=True)
+                with col_info4:
+                    st.markdown(f"<p style='font-size: 18px !important; color: #7b2ff7 !important;'><b>Distinct:</b> ≈{stats['distinct']:,}</p>", unsafe_allow_html=True)
                 
-                if df[col].dtype == 'object' and df[col].nunique() < 50:
+                if stats['top_values'] and stats['distinct'] < 50:
                     st.markdown("<p style='font-size: 18px !important; color: #e8f0ff !important;'><b>Value Distribution:</b></p>", unsafe_allow_html=True)
-                    value_counts = df[col].value_counts().head(10)
-                    st.bar_chart(value_counts)
+                    st.bar_chart(pd.Series(dict(stats['top_values']), name='count'))
+                elif stats['top_values']:
+                    st.markdown("<p style='font-size: 18px !important; color: #e8f0ff !important;'><b>Most Frequent Values:</b></p>", unsafe_allow_html=True)
+                    st.dataframe(pd.DataFrame(stats['top_values'], columns=['Value', 'Count (at least)']), use_container_width=True)
+        
+        st.markdown("<br><br>", unsafe_allow_html=True)
+        
+        show_keyword_search(dataset_path, text_col, n_rows, models, components)
+        
+        st.markdown("<br><br>", unsafe_allow_html=True)
+        
+        show_prediction_index(dataset_path, text_col, n_rows, models)
         
         st.markdown("<br><br>", unsafe_allow_html=True)
         
         st.markdown("<h3 style='font-size: 32px;'>🎲 Random Sampling & Quick Analysis</h3>", unsafe_allow_html=True)
         
-        col1, col2 = st.columns([3, 1])
+        strata_cols = [col for col, stats in columns.items() if 1 < stats['distinct'] <= 20 and col != text_col]
+        
+        col1, col_strata, col2 = st.columns([2, 1, 1])
         with col1:
             n_samples = st.slider("Number of samples", 1, 10, 3)
+        with col_strata:
+            stratify_by = st.selectbox("Stratify by", ["None"] + strata_cols)
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)
             sample_btn = st.button("🎲 Sample & Analyze", use_container_width=True, type="primary")
         
         if sample_btn:
-            text_col = None
-            for col in ['text', 'tweet', 'content', 'message', 'Text', 'Tweet']:
-                if col in df.columns:
-                    text_col = col
-                    break
-            
             if text_col:
-                samples = df[text_col].dropna().astype(str).sample(n_samples).tolist()
+                if stratify_by != "None":
+                    samples = sample_dataset_strata(n_samples, stratify_by, text_col)
+                else:
+                    samples = sample_dataset_tweets(n_samples)
+                
+                with st.spinner(f"Analyzing {len(samples)} samples..."):
+                    batch_results = analyze_batch(samples, models, components=components)
                 
-                for idx, text in enumerate(samples):
+                for idx, (text, results) in enumerate(zip(samples, batch_results)):
                     st.markdown(f"<h4 style='font-size: 24px;'>🔍 Sample {idx + 1}</h4>", unsafe_allow_html=True)
                     
-                    with st.spinner(f"Analyzing sample {idx + 1}..."):
-                        results = analyze_text(str(text), models)
-                        
-                        st.markdown(f"""
-                        <div class='prediction-box'>
-                            <p style='font-size: 18px !important; color: #ffffff !important;'><b>Text:</b> {text}</p>
-                            <br>
-                            <div style='display: flex; justify-content: space-around; flex-wrap: wrap;'>
-                                <div style='text-align: center; margin: 10px;'>
-                                    <p style='font-size: 16px !important; color: #b4c7e7 !important;'>Sarcasm</p>
-                                    <p style='font-size: 24px !important; color: {'#f72585' if results['sarcasm']['label'] == 'Sarcastic' else '#00d4ff'} !important; font-weight: 700;'>{results['sarcasm']['label']}</p>
-                                    <p style='font-size: 16px !important; color: #e8f0ff !important;'>({results['sarcasm']['confidence']:.1%})</p>
-                                </div>
-                                <div style='text-align: center; margin: 10px;'>
-                                    <p style='font-size: 16px !important; color: #b4c7e7 !important;'>Top Emotion</p>
-                                    <p style='font-size: 32px !important;'>{get_emotion_emoji(results['emotions'][0]['label'])}</p>
-                                    <p style='font-size: 20px !important; color: #7b2ff7 !important; font-weight: 700;'>{results['emotions'][0]['label'].title()}</p>
-                                    <p style='font-size: 16px !important; color: #e8f0ff !important;'>({results['emotions'][0]['score']:.1%})</p>
-                                </div>
-                                <div style='text-align: center; margin: 10px;'>
-                                    <p style='font-size: 16px !important; color: #b4c7e7 !important;'>VADER Sentiment</p>
-                                    <p style='font-size: 28px !important; color: {'#00d4ff' if results['vader']['compound'] > 0 else ('#f72585' if results['vader']['compound'] < 0 else '#7b2ff7')} !important; font-weight: 700;'>{results['vader']['compound']:.3f}</p>
-                                    <p style='font-size: 16px !important; color: #e8f0ff !important;'>({'Positive' if results['vader']['compound'] > 0 else ('Negative' if results['vader']['compound'] < 0 else 'Neutral')})</p>
-                                </div>
+                    emotion_html = f"""
+                            <div style='text-align: center; margin: 10px;'>
+                                <p style='font-size: 16px !important; color: #b4c7e7 !important;'>Top Emotion</p>
+                                <p style='font-size: 32px !important;'>{get_emotion_emoji(results['emotions'][0]['label'])}</p>
+                                <p style='font-size: 20px !important; color: #7b2ff7 !important; font-weight: 700;'>{results['emotions'][0]['label'].title()}</p>
+                                <p style='font-size: 16px !important; color: #e8f0ff !important;'>({results['emotions'][0]['score']:.1%})</p>
+                            </div>""" if results['emotions'] is not None else ""
+                    vader_html = f"""
+                            <div style='text-align: center; margin: 10px;'>
+                                <p style='font-size: 16px !important; color: #b4c7e7 !important;'>VADER Sentiment</p>
+                                <p style='font-size: 28px !important; color: {'#00d4ff' if results['vader']['compound'] > 0 else ('#f72585' if results['vader']['compound'] < 0 else '#7b2ff7')} !important; font-weight: 700;'>{results['vader']['compound']:.3f}</p>
+                                <p style='font-size: 16px !important; color: #e8f0ff !important;'>({'Positive' if results['vader']['compound'] > 0 else ('Negative' if results['vader']['compound'] < 0 else 'Neutral')})</p>
+                            </div>""" if results['vader'] is not None else ""
+                    
+                    st.markdown(f"""
+                    <div class='prediction-box'>
+                        <p style='font-size: 18px !important; color: #ffffff !important;'><b>Text:</b> {text}</p>
+                        <br>
+                        <div style='display: flex; justify-content: space-around; flex-wrap: wrap;'>
+                            <div style='text-align: center; margin: 10px;'>
+                                <p style='font-size: 16px !important; color: #b4c7e7 !important;'>Sarcasm</p>
+                                <p style='font-size: 24px !important; color: {'#f72585' if results['sarcasm']['label'] == 'Sarcastic' else '#00d4ff'} !important; font-weight: 700;'>{results['sarcasm']['label']}</p>
+                                <p style='font-size: 16px !important; color: #e8f0ff !important;'>({results['sarcasm']['confidence']:.1%})</p>
                             </div>
+                            {emotion_html}
+                            {vader_html}
                         </div>
-                        """, unsafe_allow_html=True)
+                    </div>
+                    """, unsafe_allow_html=True)
             else:
                 st.error("❌ No text column found in dataset!")
     
@@ -149,6 +191,7 @@ def show_dataset_explorer_page(models):
             <ul style='font-size: 18px !important; color: #e8f0ff !important; line-height: 2 !important;'>
                 <li><code style='background: rgba(0,212,255,0.2); padding: 5px 10px; border-radius: 5px;'>data/eng_dataset.csv</code></li>
                 <li><code style='background: rgba(0,212,255,0.2); padding: 5px 10px; border-radius: 5px;'>data/preprocessed.csv</code></li>
+                <li><code style='background: rgba(0,212,255,0.2); padding: 5px 10px; border-radius: 5px;'>data/eng_dataset.parquet</code> / <code style='background: rgba(0,212,255,0.2); padding: 5px 10px; border-radius: 5px;'>data/preprocessed.parquet</code></li>
             </ul>
             <br>
             <p style='font-size: 18px !important; color: #e8f0ff !important;'>The dataset should contain a text column (named 'text', 'tweet', 'content', or 'message')</p>
@@ -165,7 +208,19 @@ def show_dataset_explorer_page(models):
                 st.markdown(f"<h4 style='font-size: 22px;'>Sample {idx + 1}</h4>", unsafe_allow_html=True)
                 
                 with st.spinner(f"Analyzing..."):
-                    results = analyze_text(text, st.session_state.models)
+                    results = analyze_text(text, st.session_state.models, components)
+                    
+                    emotion_html = f"""
+                            <div style='text-align: center;'>
+                                <p style='font-size: 16px !important;'>Top Emotion</p>
+                                <p style='font-size: 28px !important;'>{get_emotion_emoji(results['emotions'][0]['label'])}</p>
+                                <p style='font-size: 18px !important; color: #7b2ff7 !important;'>{results['emotions'][0]['label'].title()}</p>
+                            </div>""" if results['emotions'] is not None else ""
+                    vader_html = f"""
+                            <div style='text-align: center;'>
+                                <p style='font-size: 16px !important;'>VADER</p>
+                                <p style='font-size: 24px !important; color: {'#00d4ff' if results['vader']['compound'] > 0 else '#f72585'} !important; font-weight: 700;'>{results['vader']['compound']:.3f}</p>
+                            </div>""" if results['vader'] is not None else ""
                     
                     st.markdown(f"""
                     <div class='prediction-box'>
@@ -176,15 +231,124 @@ def show_dataset_explorer_page(models):
                                 <p style='font-size: 16px !important;'>Sarcasm</p>
                                 <p style='font-size: 24px !important; color: {'#f72585' if results['sarcasm']['label'] == 'Sarcastic' else '#00d4ff'} !important; font-weight: 700;'>{results['sarcasm']['label']}</p>
                             </div>
-                            <div style='text-align: center;'>
-                                <p style='font-size: 16px !important;'>Top Emotion</p>
-                                <p style='font-size: 28px !important;'>{get_emotion_emoji(results['emotions'][0]['label'])}</p>
-                                <p style='font-size: 18px !important; color: #7b2ff7 !important;'>{results['emotions'][0]['label'].title()}</p>
-                            </div>
-                            <div style='text-align: center;'>
-                                <p style='font-size: 16px !important;'>VADER</p>
-                                <p style='font-size: 24px !important; color: {'#00d4ff' if results['vader']['compound'] > 0 else '#f72585'} !important; font-weight: 700;'>{results['vader']['compound']:.3f}</p>
-                            </div>
+                            {emotion_html}
+                            {vader_html}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
+
+def show_keyword_search(dataset_path, text_col, n_rows, models, components):
+    """Full-text search over the dataset through the inverted keyword index"""
+    st.markdown("<h3 style='font-size: 32px;'>🔎 Keyword Search</h3>", unsafe_allow_html=True)
+    
+    if text_col is None:
+        st.info("Keyword search needs a dataset with a text column.")
+        return
+    
+    query = st.text_input("Search tweets", placeholder='monday traffic, "oh great", bless*',
+                          help='All terms must match. Quote a phrase for an exact match; end a word with * to match a prefix.')
+    if not query.strip():
+        return
+    
+    with st.spinner("Loading keyword index..."):
+        index = get_keyword_index(dataset_path, text_col)
+    start = time.time()
+    rows = index.search(query)
+    elapsed = (time.time() - start) * 1000
+    st.markdown(f"<p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #00d4ff;'>Matches:</b> {len(rows):,} ({elapsed:.1f} ms)</p>", unsafe_allow_html=True)
+    if len(rows) == 0:
+        return
+    
+    rows = rows[rows < n_rows]
+    if len(rows) == 0:
+        return
+    st.dataframe(pd.DataFrame({'Tweet': take_rows(dataset_path, rows[:200], [text_col])[text_col].astype(str).to_numpy()}), use_container_width=True, height=300)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        # A slider needs a range, so a single match is analyzed as is
+        if len(rows) > 1:
+            n_analyze = st.slider("Matches to analyze", 1, min(len(rows), 500), min(len(rows), 50))
+        else:
+            n_analyze = 1
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        analyze_btn = st.button("🔍 Analyze Matches", use_container_width=True, type="primary")
+    
+    if analyze_btn:
+        texts = take_rows(dataset_path, rows[:n_analyze], [text_col])[text_col].astype(str).tolist()
+        token_cache = dataset_token_cache(models, dataset_path, text_col, build=False)
+        token_ids = token_cache.rows(rows[:n_analyze]) if token_cache is not None and len(token_cache) == n_rows else None
+        with st.spinner(f"Analyzing {len(texts)} matches..."):
+            results = analyze_batch(texts, models, components=components, token_ids=token_ids, cache=False)
+        report_errors(results)
+        frame = results_to_frame(texts, results)
+        summary = summarize_results(frame)
+        if 'sarcastic_rate' in summary:
+            st.markdown(f"<p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #f72585;'>Sarcastic:</b> {summary['sarcastic_count']:,} of {summary['n']:,} ({summary['sarcastic_rate']:.1%})</p>", unsafe_allow_html=True)
+        st.dataframe(format_results_table(frame), use_container_width=True, height=400)
+
+def show_prediction_index(dataset_path, text_col, n_rows, models):
+    """Filter, sort and histogram the whole dataset from the precomputed prediction index"""
+    st.markdown("<h3 style='font-size: 32px;'>🗂️ Prediction Index</h3>", unsafe_allow_html=True)
+    
+    if text_col is None:
+        st.info("The prediction index needs a dataset with a text column.")
+        return
+    
+    manifest, index = get_prediction_index(dataset_path)
+    indexed = manifest['rows'] if manifest else 0
+    stale = is_stale(manifest, models)
+    if stale and manifest is not None:
+        st.warning("The models changed since the index was built; updating will rescore every row.")
+    st.caption(f"{indexed:,} of {n_rows:,} rows indexed. For large datasets run `python -m src.prediction_index`.")
+    
+    if (stale or indexed != n_rows) and st.button("🗂️ Build / Update Index", type="primary"):
+        progress_bar = st.progress(0)
+        def progress(rows, scored):
+            progress_bar.progress(min(rows / max(n_rows, 1), 1.0))
+        with st.spinner("Scoring dataset rows..."):
+            build_index(models, dataset_path, text_col, progress=progress)
+        st.rerun()
+    
+    if index is None or stale:
+        return
+    
+    emotions = [col[len('emotion_'):] for col in emotion_columns(index)]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        label = st.selectbox("Sarcasm", ["All", "Sarcastic", "Not Sarcastic"])
+        min_prob = st.slider("Min sarcasm probability", 0.0, 1.0, 0.0, 0.05)
+    with col2:
+        emotion = st.selectbox("Emotion", ["Any"] + emotions)
+        min_emotion = st.slider("Min emotion score", 0.0, 1.0, 0.5, 0.05, disabled=emotion == "Any")
+    with col3:
+        vader_range = st.slider("VADER compound", -1.0, 1.0, (-1.0, 1.0), 0.05)
+        sort_by = st.selectbox("Sort by", ["prob_sarcastic", "vader_compound"] + [f"emotion_{e}" for e in emotions])
+    
+    mask = filter_index(
+        index,
+        label=None if label == "All" else label,
+        min_prob=min_prob,
+        emotion=None if emotion == "Any" else emotion,
+        min_emotion=min_emotion,
+        vader_range=vader_range
+    )
+    matches = index[mask]
+    st.markdown(f"<p style='font-size: 20px !important; color: #e8f0ff !important;'><b style='color: #00d4ff;'>Matches:</b> {len(matches):,} of {len(index):,}</p>", unsafe_allow_html=True)
+    
+    counts, edges = np.histogram(matches['prob_sarcastic'].to_numpy(), bins=20, range=(0.0, 1.0))
+    st.bar_chart(pd.DataFrame({'rows': counts}, index=[f"{edge:.2f}" for edge in edges[:-1]]))
+    
+    top = top_matches(matches[matches['row'] < n_rows], sort_by)
+    # Read the shown tweets in row order, then put them back in ranking order
+    order = np.argsort(top['row'].to_numpy())
+    texts = take_rows(dataset_path, top['row'].to_numpy()[order], [text_col])[text_col].astype(str).to_numpy()
+    table = pd.DataFrame({
+        'Tweet': texts[np.argsort(order)],
+        'Sarcasm': top['sarcasm_label'].astype(str).to_numpy(),
+        'P(sarcastic)': top['prob_sarcastic'].to_numpy(),
+        'Top Emotion': top['top_emotion'].astype(str).to_numpy(),
+        'VADER': top['vader_compound'].to_numpy()
+    })
+    st.dataframe(table, use_container_width=True, height=400)
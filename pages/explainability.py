@@ -3,8 +3,9 @@ import pandas as pd
 import plotly.graph_objects as go
 from src.models import analyze_text
 from src.visualization import create_emotion_chart, create_sarcasm_gauge, create_vader_chart
-from src.utils import get_emotion_emoji, load_dataset_tweets, generate_random_tweets
+from src.utils import get_emotion_emoji, sample_dataset_tweets
 from src.explainability import explain_with_lime, explain_with_shap
+from src.ui import report_errors
 
 def show_explainability_page(models):
     st.markdown("<h2 style='font-size: 42px;'>🔍 Explainability (XAI)</h2>", unsafe_allow_html=True)
@@ -51,8 +52,7 @@ def show_explainability_page(models):
             st.markdown("<h3 style='font-size: 28px;'>Generate Tweets for Explanation</h3>", unsafe_allow_html=True)
         with col2:
             if st.button("🎲 Generate Tweets", use_container_width=True):
-                df = load_dataset_tweets()
-                st.session_state.random_tweets = generate_random_tweets(df, 10)
+                st.session_state.random_tweets = sample_dataset_tweets(10)
                 st.rerun()
         
         # Use session state or generate new
@@ -84,6 +84,7 @@ def show_explainability_page(models):
         
         with st.spinner("🧪 Generating explanations (optimized for speed)..."):
             results = analyze_text(selected_tweet, models)
+            report_errors(results)
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from src.models import analyze_text
+from src.models import analyze_text, analyze_batch, select_components
+from src.datasets import find_dataset_path
+from src.results import format_results_table, results_to_frame
 from src.visualization import create_emotion_chart, create_sarcasm_gauge, create_vader_chart
-from src.utils import get_emotion_emoji, load_dataset_tweets, generate_random_tweets
+from src.utils import get_emotion_emoji, sample_dataset_tweets
 from src.explainability import explain_with_lime, explain_with_shap
+from src.ui import get_embedding_store, report_errors
 
 def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
     st.markdown("<h2 style='font-size: 42px;'>💬 Single Tweet Analysis</h2>", unsafe_allow_html=True)
@@ -26,8 +29,7 @@ def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
     with col2:
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("🎲 Random Tweet", use_container_width=True):
-            df = load_dataset_tweets()
-            random_tweets = generate_random_tweets(df, 1)
+            random_tweets = sample_dataset_tweets(1)
             if random_tweets:
                 st.session_state.single_tweet_text = random_tweets[0]
                 st.rerun()
@@ -37,7 +39,8 @@ def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
     
     if analyze_btn and text_input:
         with st.spinner("🧠 Analyzing..."):
-            results = analyze_text(text_input, models)
+            results = analyze_text(text_input, models, select_components(show_emotions, show_vader))
+            report_errors(results)
             
             st.markdown(f"""
             <div class='prediction-box'>
@@ -46,6 +49,12 @@ def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
             </div>
             """, unsafe_allow_html=True)
             
+            timings = results['timings']
+            st.caption(
+                "⏱️ " + " • ".join(f"{name}: {timings[name] * 1000:.0f} ms" for name in ('sarcasm', 'emotion', 'vader') if name in timings)
+                + f" • total: {timings['total'] * 1000:.0f} ms"
+            )
+            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -81,19 +90,22 @@ def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
                 st.markdown("<h3 style='font-size: 32px;'>📊 VADER Sentiment Analysis</h3>", unsafe_allow_html=True)
                 st.plotly_chart(create_vader_chart(results['vader']), use_container_width=True)
             
-            st.markdown("<h3 style='font-size: 32px;'>🎭 Detailed Emotion Breakdown</h3>", unsafe_allow_html=True)
-            emotion_cols = st.columns(5)
-            for idx, emotion in enumerate(results['emotions'][:5]):
-                with emotion_cols[idx]:
-                    emoji = get_emotion_emoji(emotion['label'])
-                    st.markdown(f"""
-                    <div class='metric-card' style='text-align: center;'>
-                        <div style='font-size: 48px; margin-bottom: 10px;'>{emoji}</div>
-                        <h4 style='font-size: 18px;'>{emotion['label'].title()}</h4>
-                        <p style='font-size: 28px !important; color: #00d4ff !important; font-weight: 700;'>{emotion['score']:.1%}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+            if show_emotions:
+                st.markdown("<h3 style='font-size: 32px;'>🎭 Detailed Emotion Breakdown</h3>", unsafe_allow_html=True)
+                emotion_cols = st.columns(5)
+                for idx, emotion in enumerate(results['emotions'][:5]):
+                    with emotion_cols[idx]:
+                        emoji = get_emotion_emoji(emotion['label'])
+                        st.markdown(f"""
+                        <div class='metric-card' style='text-align: center;'>
+                            <div style='font-size: 48px; margin-bottom: 10px;'>{emoji}</div>
+                            <h4 style='font-size: 18px;'>{emotion['label'].title()}</h4>
+                            <p style='font-size: 28px !important; color: #00d4ff !important; font-weight: 700;'>{emotion['score']:.1%}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
 
+            show_similar_tweets(text_input, models, select_components(show_emotions, show_vader))
+            
             # Explainability Section
             st.markdown("<br><br>", unsafe_allow_html=True)
             st.markdown("<h3 style='font-size: 36px;'>🔍 Explainability Analysis</h3>", unsafe_allow_html=True)
@@ -275,3 +287,30 @@ def show_single_tweet_page(models, show_vader, show_emotions, top_n_emotions):
                 </p>
             </div>
             """, unsafe_allow_html=True)
+
+def show_similar_tweets(text, models, components, k=5):
+    """Nearest dataset tweets by sarcasm-model embedding, with their predictions"""
+    dataset_path = find_dataset_path()
+    if dataset_path is None:
+        return
+    st.markdown("<h3 style='font-size: 32px;'>🧭 Similar Tweets</h3>", unsafe_allow_html=True)
+    try:
+        store = get_embedding_store(dataset_path, models['model_ids']['sarcasm'])
+    except Exception as e:
+        st.warning(f"Similar tweets unavailable: {str(e)}")
+        return
+    if store is None:
+        st.caption("Run `python -m src.embeddings` to embed the dataset and enable similar-tweet search.")
+        return
+    try:
+        rows, scores, texts = store.similar(models, text=text, k=k)
+    except Exception as e:
+        st.warning(f"Similar tweets unavailable: {str(e)}")
+        return
+    if not texts:
+        st.caption("No similar tweets found.")
+        return
+    results = analyze_batch(texts, models, components=components)
+    table = format_results_table(results_to_frame(texts, results))
+    table.insert(1, 'Similarity', scores)
+    st.dataframe(table, use_container_width=True)
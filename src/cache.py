@@ -0,0 +1,199 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+def normalize_text(text):
+    """Normalize text for cache keys (unicode form and whitespace only, case is kept)"""
+    return ' '.join(unicodedata.normalize('NFC', str(text)).split())
+
+def make_key(kind, text, model_id):
+    """Content-addressed cache key for one prediction"""
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return f"{kind}:{model_id}:{digest}"
+
+class DiskStore:
+    """SQLite-backed key/value store with least-recently-used eviction.
+
+    The ``*_many`` methods run one transaction per call; the row count is kept
+    in memory and only re-read from the database when eviction looks due.
+    """
+    
+    def __init__(self, path, max_entries=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def get(self, key):
+        return self.get_many([key])[0]
+    
+    def get_many(self, keys, chunk_size=500):
+        """Values for ``keys`` (None where missing), refreshing their access time"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                found.update(self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+        return [pickle.loads(found[key]) if key in found else None for key in keys]
+    
+    def set(self, key, value):
+        return self.set_many([(key, value)])
+    
+    def set_many(self, items):
+        """Store ``(key, value)`` pairs in one transaction; returns the number of evicted entries"""
+        rows = [(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for key, value in items]
+        evicted = 0
+        with self._lock:
+            now = time.time()
+            for key, blob in rows:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO entries (key, value, accessed) VALUES (?, ?, ?)", (key, blob, now)
+                ).rowcount
+                if inserted:
+                    self._count += 1
+                else:
+                    self._conn.execute("UPDATE entries SET value = ?, accessed = ? WHERE key = ?", (blob, now, key))
+            if self.max_entries and self._count > self.max_entries:
+                # Other processes may share the file, so recount before evicting
+                self._count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if self._count > self.max_entries:
+                    evicted = self._count - self.max_entries
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY accessed ASC LIMIT ?)",
+                        (evicted,)
+                    )
+                    self._count -= evicted
+            self._conn.commit()
+        return evicted
+    
+    def __len__(self):
+        return self._count
+
+class PredictionCache:
+    """Bounded in-memory LRU cache with an optional on-disk tier.
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` (pickled size) is exceeded. Memory misses fall through to
+    the disk store, so a restarted server keeps its warm set.
+    """
+    
+    def __init__(self, max_entries=50000, max_bytes=None, disk_path=None, disk_max_entries=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = DiskStore(disk_path, disk_max_entries or max_entries * 10) if disk_path else None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+    
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+        
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._store(key, value)
+                return value
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def get_many(self, keys):
+        """Cached values for ``keys`` (None on a miss), reading the disk tier in one query"""
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                results.append(entry[0] if entry is not None else None)
+            self.hits += sum(result is not None for result in results)
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing and self.disk is not None:
+            for i, value in zip(missing, self.disk.get_many([keys[i] for i in missing])):
+                if value is not None:
+                    results[i] = value
+                    self._store(keys[i], value)
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+        
+        with self._lock:
+            self.misses += sum(result is None for result in results)
+        return results
+    
+    def set(self, key, value):
+        self.set_many([(key, value)])
+    
+    def set_many(self, items):
+        """Store ``(key, value)`` pairs, writing the disk tier in one transaction"""
+        items = list(items)
+        for key, value in items:
+            self._store(key, value)
+        if self.disk is not None and items:
+            evicted = self.disk.set_many(items)
+            with self._lock:
+                self.disk_evictions += evicted
+    
+    def _store(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def stats(self):
+        """Hit, miss and eviction counters plus current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'disk_entries': len(self.disk) if self.disk is not None else 0
+            }
@@ -0,0 +1,65 @@
+import os
+
+# Runtime settings, overridable through environment variables
+
+SARCASM_MODEL_NAME = os.environ.get('SENTISARC_SARCASM_MODEL', "cardiffnlp/twitter-roberta-base-irony")
+EMOTION_MODEL_NAME = os.environ.get('SENTISARC_EMOTION_MODEL', "SamLowe/roberta-base-go_emotions")
+
+CACHE_DIR = os.environ.get('SENTISARC_CACHE_DIR', '.sentisarc_cache')
+
+# Prediction cache: in-memory LRU bounds, plus an optional on-disk tier
+PREDICTION_CACHE_ENTRIES = int(os.environ.get('SENTISARC_PREDICTION_CACHE_ENTRIES', 50000))
+PREDICTION_CACHE_BYTES = int(os.environ.get('SENTISARC_PREDICTION_CACHE_BYTES', 256 * 1024 * 1024))
+PREDICTION_CACHE_DISK = os.environ.get('SENTISARC_PREDICTION_CACHE_DISK', '1') == '1'
+
+# Explanation cache and explainer parameters
+EXPLANATION_CACHE_ENTRIES = int(os.environ.get('SENTISARC_EXPLANATION_CACHE_ENTRIES', 5000))
+LIME_NUM_SAMPLES = int(os.environ.get('SENTISARC_LIME_NUM_SAMPLES', 100))
+LIME_NUM_FEATURES = int(os.environ.get('SENTISARC_LIME_NUM_FEATURES', 8))
+EXPLANATION_SEED = int(os.environ.get('SENTISARC_EXPLANATION_SEED', 42))
+
+# Dynamic int8 quantization of the transformer linear layers (CPU only)
+QUANTIZE = os.environ.get('SENTISARC_QUANTIZE', '0') == '1'
+
+# Inference backend: 'torch' (eager PyTorch) or 'onnx' (ONNX Runtime, graphs cached under CACHE_DIR)
+BACKEND = os.environ.get('SENTISARC_BACKEND', 'torch')
+
+# Components to load in a background thread at startup (comma-separated models keys,
+# e.g. "sarcasm_model,vader"); everything else loads lazily on first use
+PREFETCH = [key.strip() for key in os.environ.get('SENTISARC_PREFETCH', '').split(',') if key.strip()]
+
+# Run the sarcasm, emotion and VADER stages of an analysis concurrently
+PARALLEL_STAGES = os.environ.get('SENTISARC_PARALLEL_STAGES', '1') == '1'
+# Intra-op threads per model (0 = library default). ONNX sessions get their own
+# pools; eager PyTorch has one process-wide pool sized to the sum.
+SARCASM_THREADS = int(os.environ.get('SENTISARC_SARCASM_THREADS', 0))
+EMOTION_THREADS = int(os.environ.get('SENTISARC_EMOTION_THREADS', 0))
+
+# Cross-session micro-batching of model calls
+MICRO_BATCHING = os.environ.get('SENTISARC_MICRO_BATCHING', '1') == '1'
+MICRO_BATCH_SIZE = int(os.environ.get('SENTISARC_MICRO_BATCH_SIZE', 32))
+MICRO_BATCH_WAIT_MS = float(os.environ.get('SENTISARC_MICRO_BATCH_WAIT_MS', 5))
+
+# Duplicate collapsing before batch inference: 'exact' (after whitespace/URL/mention
+# normalization), 'near' (also SimHash near-duplicates) or 'off'
+DEDUPE = os.environ.get('SENTISARC_DEDUPE', 'exact')
+DEDUPE_LOWERCASE = os.environ.get('SENTISARC_DEDUPE_LOWERCASE', '0') == '1'
+
+# Convert CSV datasets to Parquet once (cached under CACHE_DIR) and read that instead
+PARQUET_CACHE = os.environ.get('SENTISARC_PARQUET_CACHE', '1') == '1'
+
+# Memory budget for loaded dataset frames shared by all sessions
+DATASET_CACHE_BYTES = int(os.environ.get('SENTISARC_DATASET_CACHE_BYTES', 2 * 1024 ** 3))
+
+# Datasets larger than this are sampled from disk (row-offset index / row-group reads)
+# instead of being loaded into the dataset cache
+SAMPLE_IN_MEMORY_BYTES = int(os.environ.get('SENTISARC_SAMPLE_IN_MEMORY_BYTES', 256 * 1024 ** 2))
+
+# Inverted lists probed per similar-tweets query (higher = more accurate, slower)
+EMBEDDING_NPROBE = int(os.environ.get('SENTISARC_EMBEDDING_NPROBE', 16))
+
+# Streamed CSV results (under CACHE_DIR/streams) older than this are deleted
+STREAM_RESULT_MAX_AGE_HOURS = float(os.environ.get('SENTISARC_STREAM_RESULT_MAX_AGE_HOURS', 24))
+
+# Pre-tokenize the dataset once (memory-mapped token ids) for dataset-wide inference passes
+TOKEN_CACHE = os.environ.get('SENTISARC_TOKEN_CACHE', '1') == '1'
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+from . import config
+
+DATASET_PATHS = [
+    'data/eng_dataset.parquet',
+    'data/eng_dataset.csv',
+    'data/preprocessed.parquet',
+    'data/preprocessed.csv',
+    'eng_dataset.parquet',
+    'eng_dataset.csv',
+    'preprocessed.parquet',
+    'preprocessed.csv',
+    '../data/eng_dataset.parquet',
+    '../data/eng_dataset.csv',
+    '../data/preprocessed.parquet',
+    '../data/preprocessed.csv'
+]
+
+def find_dataset_path():
+    """First existing dataset file, preferring Parquet over CSV"""
+    for path in DATASET_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+def is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+def file_fingerprint(path):
+    """Identity of a file's current contents: absolute path, size and mtime"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+# Bumped when the CSV conversion changes, so older cached conversions are not reused
+PARQUET_CONVERSION_VERSION = 2
+
+def parquet_cache_path(csv_path):
+    key = f"{file_fingerprint(csv_path)}:v{PARQUET_CONVERSION_VERSION}"
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(config.CACHE_DIR, 'datasets', f"{name}-{digest}.parquet")
+
+def _convert_csv(csv_path, out_path, block_size, column_types=None):
+    """Stream a CSV into a Parquet file; returns False if the CSV has no data"""
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+    # Empty fields become nulls, as they do with pandas.read_csv
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(strings_can_be_null=True, column_types=column_types)
+    )
+    writer = None
+    try:
+        for batch in reader:
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return writer is not None
+
+def _infer_column_types(csv_path, chunk_size=262144):
+    """Arrow column types that fit every row, from a full pass over the CSV"""
+    import pyarrow as pa
+    kinds = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size, low_memory=False):
+        for col in chunk.columns:
+            values = chunk[col].dropna()
+            if values.empty:
+                continue
+            if pd.api.types.is_bool_dtype(values):
+                kind = 'bool'
+            elif pd.api.types.is_integer_dtype(values):
+                kind = 'int'
+            elif pd.api.types.is_float_dtype(values):
+                kind = 'float'
+            else:
+                kind = 'string'
+            previous = kinds.get(col, kind)
+            if previous != kind:
+                kind = 'float' if {previous, kind} == {'int', 'float'} else 'string'
+            kinds[col] = kind
+    types = {'bool': pa.bool_(), 'int': pa.int64(), 'float': pa.float64(), 'string': pa.string()}
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    return {col: types[kinds.get(col, 'string')] for col in columns}
+
+_conversion_locks = {}
+_conversion_locks_guard = threading.Lock()
+
+def _conversion_lock(path):
+    with _conversion_locks_guard:
+        return _conversion_locks.setdefault(path, threading.Lock())
+
+def ensure_parquet(csv_path, block_size=64 * 1024 * 1024):
+    """Convert a CSV to Parquet once, cached by the CSV's fingerprint.
+
+    The CSV is streamed through pyarrow's incremental reader into row groups,
+    so conversion memory is bounded by ``block_size``. Column types are
+    inferred from the first block; if a later block does not fit them the
+    conversion is redone with types inferred from the whole file. Each
+    conversion writes its own temp file and threads share one conversion per
+    file, so concurrent sessions and processes never clobber each other.
+    Returns the cached Parquet path, or None if pyarrow is not installed or
+    the file cannot be converted (callers then read the CSV with pandas).
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    
+    path = parquet_cache_path(csv_path)
+    if os.path.exists(path):
+        return path
+    
+    with _conversion_lock(path):
+        if os.path.exists(path):
+            return path
+        if os.path.exists(path + '.failed'):
+            return None
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+        os.close(fd)
+        try:
+            try:
+                try:
+                    converted = _convert_csv(csv_path, tmp_path, block_size)
+                except pa.ArrowInvalid:
+                    converted = _convert_csv(csv_path, tmp_path, block_size, _infer_column_types(csv_path))
+            except (pa.ArrowInvalid, ValueError) as e:
+                print(f"❌ Parquet conversion failed, reading CSV directly: {str(e)}")
+                converted = False
+                # Remember the failure for this file version instead of retrying on every call
+                open(path + '.failed', 'w').close()
+            if not converted:
+                return None
+            try:
+                os.replace(tmp_path, path)
+            except OSError:
+                # Another process finished the same conversion first
+                if not os.path.exists(path):
+                    raise
+            return path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def columnar_path(path):
+    """Parquet path to read for a dataset: itself, or its cached conversion"""
+    if is_parquet(path):
+        return path
+    if config.PARQUET_CACHE:
+        return ensure_parquet(path)
+    return None
+
+def dataset_columns(path):
+    """Column names without reading any rows"""
+    parquet_path = columnar_path(path)
+    if parquet_path:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(parquet_path, memory_map=True).schema_arrow.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+def read_dataset(path, columns=None):
+    """Read a dataset, projecting to ``columns`` if given.
+
+    Parquet (or the cached Parquet conversion of a CSV) is memory-mapped and
+    only the requested columns are decoded; plain CSV falls back to pandas
+    with ``usecols``.
+    """
+    parquet_path = columnar_path(path)
+    if parquet_path:
+        import pyarrow.parquet as pq
+        return pq.read_table(parquet_path, columns=columns, memory_map=True).to_pandas()
+    return pd.read_csv(path, usecols=columns)
+
+def iter_dataset_batches(path, columns=None, batch_size=65536):
+    """Stream a dataset as DataFrames of at most ``batch_size`` rows (row-group level for Parquet)"""
+    parquet_path = columnar_path(path)
+    if parquet_path:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(parquet_path, memory_map=True).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+
+def frame_to_parquet_bytes(frame):
+    """Serialize a results table to Parquet for download"""
+    import io
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+def compact_dtypes(frame, text_col=None, max_category_ratio=0.5):
+    """Shrink a dataset frame: pyarrow strings for text, category for label-like columns"""
+    for col in frame.columns:
+        if frame[col].dtype != object and not pd.api.types.is_string_dtype(frame[col]):
+            continue
+        if col == text_col:
+            try:
+                frame[col] = frame[col].astype('string[pyarrow]')
+            except ImportError:
+                pass
+        elif len(frame) and frame[col].nunique(dropna=True) <= max_category_ratio * len(frame):
+            frame[col] = frame[col].astype('category')
+    return frame
+
+class DatasetCache:
+    """Process-wide cache of loaded dataset frames.
+
+    Entries are keyed by path and projected columns and validated against
+    the file's size and mtime on every lookup, so an edited dataset is
+    reloaded. Total frame memory is bounded by ``max_bytes`` with LRU
+    eviction. Cached frames are shared by all sessions and must not be
+    mutated in place.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+    
+    def get(self, path, columns=None, text_col=None):
+        key = (os.path.abspath(path), tuple(columns) if columns else None)
+        fingerprint = file_fingerprint(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                return entry[1]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == fingerprint:
+                    return entry[1]
+            frame = compact_dtypes(read_dataset(path, columns), text_col)
+            size = int(frame.memory_usage(deep=True).sum())
+            with self._lock:
+                if key in self._entries:
+                    self._bytes -= self._entries.pop(key)[2]
+                self._entries[key] = (fingerprint, frame, size)
+                self._bytes += size
+                while len(self._entries) > 1 and self._bytes > self.max_bytes:
+                    _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+            return frame
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+dataset_cache = DatasetCache(config.DATASET_CACHE_BYTES)
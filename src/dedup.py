@@ -0,0 +1,73 @@
+import hashlib
+import re
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+MENTION_PATTERN = re.compile(r'@\w+')
+
+def normalize_for_dedup(text, lowercase=False, placeholders=True):
+    """Normalize a tweet for duplicate detection.
+
+    Collapses whitespace and, with ``placeholders``, maps URLs and @mentions
+    to ``http`` and ``@user`` (the same convention the Cardiff NLP Twitter
+    models were trained with), so retweets differing only in links or handles
+    collapse. Case is kept unless ``lowercase`` is set, since the models are
+    case-sensitive.
+    """
+    text = str(text)
+    if placeholders:
+        text = URL_PATTERN.sub('http', text)
+        text = MENTION_PATTERN.sub('@user', text)
+    text = ' '.join(text.split())
+    return text.lower() if lowercase else text
+
+def simhash(text, bits=64, shingle_size=4):
+    """64-bit SimHash over character shingles"""
+    shingles = [text[i:i + shingle_size] for i in range(max(1, len(text) - shingle_size + 1))]
+    weights = [0] * bits
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(bits):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+def deduplicate(texts, lowercase=False, placeholders=True, near_duplicates=False, max_distance=5):
+    """Collapse duplicate texts before inference.
+
+    Returns ``(unique_texts, index)`` where ``unique_texts`` holds the first
+    original text of each group and ``index[i]`` is the group of ``texts[i]``.
+    Near-duplicates are found with SimHash: fingerprints are split into eight
+    8-bit bands, and texts sharing a band within ``max_distance`` bits join
+    the same group (``max_distance`` must stay below 8 for banding to be exact).
+    """
+    unique_texts = []
+    index = []
+    groups = {}
+    bands = [{} for _ in range(8)]
+    fingerprints = []
+    
+    for text in texts:
+        key = normalize_for_dedup(text, lowercase, placeholders)
+        group = groups.get(key)
+        
+        if group is None and near_duplicates:
+            fingerprint = simhash(key)
+            for band, table in enumerate(bands):
+                for candidate in table.get(fingerprint >> (8 * band) & 0xFF, ()):
+                    if bin(fingerprints[candidate] ^ fingerprint).count('1') <= max_distance:
+                        group = candidate
+                        break
+                if group is not None:
+                    break
+            if group is None:
+                fingerprints.append(fingerprint)
+                for band, table in enumerate(bands):
+                    table.setdefault(fingerprint >> (8 * band) & 0xFF, []).append(len(unique_texts))
+            groups[key] = group if group is not None else len(unique_texts)
+        
+        if group is None:
+            group = len(unique_texts)
+            groups[key] = group
+            unique_texts.append(text)
+        index.append(group)
+    
+    return unique_texts, index
@@ -0,0 +1,237 @@
+"""Sarcasm-model embeddings for the dataset and approximate "similar tweets" search.
+
+The store lives under ``<CACHE_DIR>/embeddings/<dataset>-<digest>/``, keyed by
+the dataset fingerprint and the sarcasm model id:
+
+- ``embeddings.f16``: memory-mapped float16 matrix, one L2-normalized mean-pooled
+  embedding per dataset row, filled chunk by chunk so an interrupted build
+  resumes where it stopped (``manifest.json`` records progress)
+- ``ivf_*.npy``: an IVF index built locally with k-means. ``ivf_vectors.f16``
+  holds the embeddings reordered so each inverted list is contiguous, so a
+  query scores only the ``nprobe`` lists nearest to it.
+
+Build with ``python -m src.embeddings`` (torch backend only).
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+from . import config
+from .datasets import dataset_columns, file_fingerprint, find_dataset_path, iter_dataset_batches
+from .models import embed_texts
+from .sampling import row_count, take_rows
+from .token_cache import dataset_token_cache
+from .utils import find_text_column
+
+def embedding_dir(dataset_path, model_id):
+    digest = hashlib.sha256(f"{file_fingerprint(dataset_path)}:{model_id}".encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return os.path.join(config.CACHE_DIR, 'embeddings', f"{name}-{digest}")
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path, data):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+def kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """Spherical k-means on unit vectors; returns float32 centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignment = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        empty = counts == 0
+        # Re-seed empty clusters from random points
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+    return centroids
+
+def assign_lists(vectors, centroids, batch_size=65536):
+    """Nearest centroid (by inner product) for every vector"""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        block = np.asarray(vectors[start:start + batch_size], dtype=np.float32)
+        assignment[start:start + batch_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+class EmbeddingStore:
+    """Dataset embeddings with an IVF index for top-k cosine similarity"""
+    
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.dataset_path = manifest['dataset_path']
+        self.text_col = manifest['text_col']
+        self._ivf = None
+    
+    @classmethod
+    def open(cls, dataset_path, model_id):
+        """The store for this dataset version and model, or None if it is not complete"""
+        directory = embedding_dir(dataset_path, model_id)
+        manifest = _read_json(os.path.join(directory, 'manifest.json'))
+        if manifest is None or manifest['rows_done'] < manifest['rows'] or not manifest.get('ivf_lists'):
+            return None
+        return cls(directory, manifest)
+    
+    @classmethod
+    def build(cls, models, dataset_path=None, text_col=None, chunk_size=4096, batch_size=32, progress=None):
+        """Embed every dataset row (resuming a partial build), then build the IVF index"""
+        dataset_path = dataset_path or find_dataset_path()
+        if dataset_path is None:
+            raise FileNotFoundError("No dataset found")
+        text_col = text_col or find_text_column(dataset_columns(dataset_path))
+        if text_col is None:
+            raise ValueError("No text column found in dataset")
+        
+        directory = embedding_dir(dataset_path, models['model_ids']['sarcasm'])
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, 'manifest.json')
+        manifest = _read_json(manifest_path)
+        if manifest is None:
+            manifest = {
+                'dataset_path': os.path.abspath(dataset_path),
+                'text_col': text_col,
+                'rows': row_count(dataset_path),
+                'dim': models['sarcasm_model'].config.hidden_size,
+                'rows_done': 0,
+                'ivf_lists': 0
+            }
+            np.memmap(os.path.join(directory, 'embeddings.f16'), dtype=np.float16, mode='w+',
+                      shape=(max(manifest['rows'], 1), manifest['dim'])).flush()
+            _write_json(manifest_path, manifest)
+        
+        matrix = np.memmap(os.path.join(directory, 'embeddings.f16'), dtype=np.float16, mode='r+',
+                           shape=(max(manifest['rows'], 1), manifest['dim']))
+        token_cache = dataset_token_cache(models, dataset_path, text_col) if manifest['rows_done'] < manifest['rows'] else None
+        rows = 0
+        for batch in iter_dataset_batches(dataset_path, [text_col], chunk_size):
+            if rows + len(batch) > manifest['rows']:
+                raise ValueError("Dataset row count changed during the embedding build")
+            start = max(manifest['rows_done'] - rows, 0)
+            if start < len(batch):
+                texts = batch[text_col].fillna('').astype(str).tolist()[start:]
+                token_ids = token_cache.range(rows + start, rows + len(batch)) if token_cache is not None and len(token_cache) >= rows + len(batch) else None
+                _, embeddings = embed_texts(texts, models, batch_size, token_ids)
+                matrix[rows + start:rows + len(batch)] = embeddings
+                matrix.flush()
+                manifest['rows_done'] = rows + len(batch)
+                _write_json(manifest_path, manifest)
+                if progress:
+                    progress(manifest['rows_done'], manifest['rows'])
+            rows += len(batch)
+        
+        if not manifest['ivf_lists']:
+            cls._build_ivf(directory, matrix[:manifest['rows']])
+            manifest['ivf_lists'] = int(np.load(os.path.join(directory, 'ivf_offsets.npy')).size - 1)
+            _write_json(manifest_path, manifest)
+        return cls(directory, manifest)
+    
+    @staticmethod
+    def _build_ivf(directory, matrix, sample_size=32768):
+        n = len(matrix)
+        n_lists = max(1, min(1024, int(4 * np.sqrt(n)), n))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(matrix[np.sort(rng.choice(n, min(sample_size, n), replace=False))], dtype=np.float32)
+        centroids = kmeans(sample, n_lists)
+        assignment = assign_lists(matrix, centroids)
+        order = np.argsort(assignment, kind='stable')
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=offsets[1:])
+        
+        vectors = np.memmap(os.path.join(directory, 'ivf_vectors.f16'), dtype=np.float16, mode='w+', shape=matrix.shape)
+        for start in range(0, n, 65536):
+            vectors[start:start + 65536] = matrix[order[start:start + 65536]]
+        vectors.flush()
+        np.save(os.path.join(directory, 'ivf_centroids.npy'), centroids)
+        np.save(os.path.join(directory, 'ivf_rows.npy'), order.astype(np.int64))
+        np.save(os.path.join(directory, 'ivf_offsets.npy'), offsets)
+    
+    def _load_ivf(self):
+        if self._ivf is None:
+            shape = (self.manifest['rows'], self.manifest['dim'])
+            self._ivf = (
+                np.load(os.path.join(self.directory, 'ivf_centroids.npy')),
+                np.load(os.path.join(self.directory, 'ivf_offsets.npy')),
+                np.load(os.path.join(self.directory, 'ivf_rows.npy'), mmap_mode='r'),
+                np.memmap(os.path.join(self.directory, 'ivf_vectors.f16'), dtype=np.float16, mode='r', shape=shape)
+            )
+        return self._ivf
+    
+    def vector(self, row):
+        matrix = np.memmap(os.path.join(self.directory, 'embeddings.f16'), dtype=np.float16, mode='r',
+                           shape=(self.manifest['rows'], self.manifest['dim']))
+        return np.asarray(matrix[row], dtype=np.float32)
+    
+    def search(self, vector, k=10, nprobe=None, exclude=()):
+        """Top-k (rows, cosine similarities) for a query vector, probing the nearest lists"""
+        centroids, offsets, rows, vectors = self._load_ivf()
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        nprobe = min(nprobe or config.EMBEDDING_NPROBE, len(centroids))
+        lists = np.argpartition(-(centroids @ vector), nprobe - 1)[:nprobe]
+        candidates = []
+        scores = []
+        for i in lists:
+            start, end = offsets[i], offsets[i + 1]
+            if start < end:
+                candidates.append(np.asarray(rows[start:end]))
+                scores.append(np.asarray(vectors[start:end], dtype=np.float32) @ vector)
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        candidates = np.concatenate(candidates)
+        scores = np.concatenate(scores)
+        if exclude:
+            keep = ~np.isin(candidates, list(exclude))
+            candidates, scores = candidates[keep], scores[keep]
+        top = np.argsort(-scores, kind='stable')[:k]
+        return candidates[top], scores[top]
+    
+    def similar(self, models, text=None, row=None, k=10, nprobe=None):
+        """The k tweets most similar to a dataset row or to any text, as (rows, scores, texts)"""
+        if row is not None:
+            vector = self.vector(row)
+            exclude = (row,)
+        else:
+            _, embeddings = embed_texts([text], models)
+            vector = embeddings[0]
+            exclude = ()
+        rows, scores = self.search(vector, k, nprobe, exclude)
+        if len(rows) == 0:
+            return rows, scores, []
+        order = np.argsort(rows)
+        texts = take_rows(self.dataset_path, rows[order], [self.text_col])[self.text_col].astype(str).tolist()
+        texts = [texts[i] for i in np.argsort(order)]
+        return rows, scores, texts
+
+def main():
+    import argparse
+    from .models import load_models
+    
+    parser = argparse.ArgumentParser(description="Embed the dataset with the sarcasm model and build the similarity index")
+    parser.add_argument('dataset', nargs='?', help="dataset path (default: the app's dataset)")
+    parser.add_argument('--text-column', help="text column (default: auto-detect)")
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    
+    start = time.time()
+    
+    def report(done, total):
+        elapsed = time.time() - start
+        print(f"{done:,}/{total:,} rows embedded ({done / max(elapsed, 1e-9):.1f} rows/s)", file=sys.stderr)
+    
+    store = EmbeddingStore.build(load_models(), args.dataset, args.text_column, args.chunk_size, args.batch_size, report)
+    print(f"Embedding store ready: {store.manifest['rows']:,} rows, {store.manifest['ivf_lists']} lists")
+
+if __name__ == '__main__':
+    main()
@@ -1,51 +1,145 @@
+import re
 import numpy as np
-import plotly.graph_objects as go
-import pandas as pd
-from .models import predict_sarcasm
+from lime.lime_text import LimeTextExplainer
+from . import config
+from .cache import make_key
+from .models import predict_sarcasm_batch, score_token_ids
 
-def explain_with_lime(text, models):
+class CachedExplanation:
+    """Serializable stand-in for a LIME Explanation (top labels and feature weights)"""
+    
+    def __init__(self, top_labels, weights):
+        self.top_labels = list(top_labels)
+        self.weights = {int(label): list(items) for label, items in weights.items()}
+    
+    @classmethod
+    def from_lime(cls, exp):
+        return cls(exp.top_labels, {label: exp.as_list(label=label) for label in exp.top_labels})
+    
+    def as_list(self, label=1):
+        return self.weights[label]
+    
+    def to_dict(self):
+        return {'top_labels': self.top_labels, 'weights': self.weights}
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['top_labels'], data['weights'])
+
+def explanation_key(text, models, explainer, **params):
+    """Cache key for an explanation: text hash, model id and revision, explainer and its parameters"""
+    param_str = ','.join(f"{name}={params[name]}" for name in sorted(params))
+    return make_key(f"{explainer}[{param_str}]", text, models['model_ids']['sarcasm'])
+
+def explain_with_lime(text, models, batch_size=32, num_features=None, num_samples=None, seed=None):
     """Generate LIME explanation with optimized performance"""
+    num_features = num_features or config.LIME_NUM_FEATURES
+    num_samples = num_samples or config.LIME_NUM_SAMPLES
+    seed = config.EXPLANATION_SEED if seed is None else seed
+    
+    cache = models.get('explanation_cache')
+    if cache is not None:
+        key = explanation_key(text, models, 'lime', num_samples=num_samples, num_features=num_features, seed=seed)
+        cached = cache.get(key)
+        if cached is not None:
+            return CachedExplanation.from_dict(cached)
+    
     def predictor(texts):
-        results = []
-        for txt in texts:
-            pred = predict_sarcasm(txt, models['sarcasm_tokenizer'], models['sarcasm_model'])
-            results.append([pred['prob_not_sarcastic'], pred['prob_sarcastic']])
-        return np.array(results)
+        # LIME repeats perturbations often for short tweets, so score each unique string once
+        unique_texts = list(dict.fromkeys(texts))
+        preds = predict_sarcasm_batch(unique_texts, models['sarcasm_tokenizer'], models['sarcasm_model'], batch_size)
+        scores = {txt: [pred['prob_not_sarcastic'], pred['prob_sarcastic']] for txt, pred in zip(unique_texts, preds)}
+        return np.array([scores[txt] for txt in texts])
     
-    exp = models['lime_explainer'].explain_instance(
+    # A seeded explainer per call keeps results reproducible, and therefore cacheable
+    explainer = LimeTextExplainer(
+        class_names=models['lime_explainer'].class_names,
+        bow=False,
+        random_state=seed
+    )
+    exp = CachedExplanation.from_lime(explainer.explain_instance(
         text,
         predictor,
-        num_features=8,
-        num_samples=100,
+        num_features=num_features,
+        num_samples=num_samples,
         top_labels=1
-    )
+    ))
+    
+    if cache is not None:
+        cache.set(key, exp.to_dict())
     return exp
 
-def explain_with_shap(text, models):
-    """Generate SHAP explanation with optimized performance"""
+def word_token_groups(text, tokenizer, max_length=512):
+    """Tokenize text once and group token positions by whitespace-separated word.
+
+    Uses the fast tokenizer's offset mapping to align tokens to the words of
+    ``text.split()``. Returns ``(input_ids, groups)`` where ``groups[i]`` is the
+    list of token positions covering word ``i`` (empty if truncated away).
+    """
+    encoded = tokenizer(text, truncation=True, max_length=max_length, return_offsets_mapping=True)
+    word_spans = [m.span() for m in re.finditer(r'\S+', text)]
+    groups = [[] for _ in word_spans]
+    
+    word_idx = 0
+    for pos, (start, end) in enumerate(encoded['offset_mapping']):
+        if start == end:
+            continue  # special tokens
+        while word_idx < len(word_spans) and word_spans[word_idx][1] <= start:
+            word_idx += 1
+        if word_idx < len(word_spans) and start < word_spans[word_idx][1]:
+            groups[word_idx].append(pos)
+    
+    return encoded['input_ids'], groups
+
+def explain_with_shap(text, models, batch_size=32):
+    """Generate SHAP explanation with optimized performance
+
+    Leave-one-word-out occlusion: the text is tokenized once, every variant is
+    built by dropping the token span of one word, and the original plus all
+    variants are scored together in padded batches.
+    """
+    cache = models.get('explanation_cache')
+    if cache is not None:
+        key = explanation_key(text, models, 'shap')
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
+        tokenizer = models['sarcasm_tokenizer']
         words = text.split()
-        base_pred = predict_sarcasm(text, models['sarcasm_tokenizer'], models['sarcasm_model'])
-        base_score = base_pred['prob_sarcastic']
         
-        word_scores = []
-        for i in range(len(words)):
-            temp_words = words[:i] + words[i+1:]
-            temp_text = ' '.join(temp_words)
-            
-            if temp_text.strip():
-                temp_pred = predict_sarcasm(temp_text, models['sarcasm_tokenizer'], models['sarcasm_model'])
-                importance = base_score - temp_pred['prob_sarcastic']
-                word_scores.append(importance)
-            else:
-                word_scores.append(0.0)
+        if tokenizer.is_fast:
+            input_ids, groups = word_token_groups(text, tokenizer)
+            n_special = len(tokenizer.build_inputs_with_special_tokens([]))
+            variants = [input_ids]
+            for group in groups:
+                dropped = set(group)
+                variants.append([tok for pos, tok in enumerate(input_ids) if pos not in dropped])
+            probs = score_token_ids(variants, models['sarcasm_model'], tokenizer.pad_token_id, batch_size)
+            sarcastic = probs[:, 1].tolist()
+            empty = [len(ids) <= n_special for ids in variants[1:]]
+        else:
+            variants = [text] + [' '.join(words[:i] + words[i+1:]) for i in range(len(words))]
+            preds = predict_sarcasm_batch(variants, tokenizer, models['sarcasm_model'], batch_size)
+            sarcastic = [pred['prob_sarcastic'] for pred in preds]
+            empty = [not variant.strip() for variant in variants[1:]]
+        
+        base_score = sarcastic[0]
+        word_scores = [
+            0.0 if is_empty else base_score - score
+            for score, is_empty in zip(sarcastic[1:], empty)
+        ]
         
-        return {
+        result = {
             'words': words,
             'scores': word_scores,
             'base_value': 0.5,
             'final_value': base_score
         }
+        if cache is not None:
+            cache.set(key, result)
+        return result
         
     except Exception as e:
         print(f"⚠️ SHAP explanation not available: {str(e)}")
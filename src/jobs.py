@@ -0,0 +1,286 @@
+"""Resumable background batch jobs with per-chunk checkpoints.
+
+Each job lives in its own directory under ``<CACHE_DIR>/jobs/<job_id>``:
+``job.json`` holds its state, ``input.csv`` the submitted data and
+``parts/part-NNNNNN.csv`` one scored chunk each. A chunk is written
+atomically, so after a crash or restart a job resumes at the first missing
+part. ``lease.json`` marks the process currently running a job (see
+``JobLease``), so the app and ``python -m src.jobs`` never run the same job
+at once. Run ``python -m src.jobs`` to process pending jobs outside the app.
+"""
+import glob
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from . import config
+from .models import analyze_batch, ALL_COMPONENTS
+from .results import result_record
+
+PENDING_STATUSES = ('queued', 'running')
+
+# A lease whose heartbeat is older than this is considered abandoned
+LEASE_SECONDS = 60
+
+def _pid_alive(pid):
+    if os.name != 'posix':
+        # os.kill would terminate the process on Windows; rely on the heartbeat
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def _read_owner(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+class JobLease:
+    """Lock file claiming a job for one process, kept fresh by a heartbeat thread
+
+    The file holds the owner's host, PID and a random token; its mtime is the
+    heartbeat. A lease is live while the heartbeat is recent and, on the same
+    host, the owning PID still exists.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.token = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @staticmethod
+    def is_live(path):
+        try:
+            heartbeat = os.path.getmtime(path)
+        except FileNotFoundError:
+            return False
+        if time.time() - heartbeat > LEASE_SECONDS:
+            return False
+        owner = _read_owner(path)
+        if owner is not None and owner.get('host') == socket.gethostname():
+            return _pid_alive(owner['pid'])
+        return True
+    
+    def acquire(self):
+        """Take the lease (replacing an abandoned one); False if another process holds it"""
+        if os.path.exists(self.path) and not self.is_live(self.path):
+            stale = f"{self.path}.{self.token}"
+            try:
+                # Renaming succeeds for one process only, so only one takes over
+                os.rename(self.path, stale)
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'host': socket.gethostname(), 'pid': os.getpid(), 'token': self.token}, f)
+        self._thread = threading.Thread(target=self._heartbeat, name='job-lease', daemon=True)
+        self._thread.start()
+        return True
+    
+    def held(self):
+        owner = _read_owner(self.path)
+        return owner is not None and owner.get('token') == self.token
+    
+    def _heartbeat(self):
+        while not self._stop.wait(LEASE_SECONDS / 4):
+            if not self.held():
+                return
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+    
+    def release(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.held():
+            os.remove(self.path)
+
+class JobManager:
+    """Runs batch jobs on a small thread pool and tracks them on disk"""
+    
+    def __init__(self, models, root=None, workers=1, resume=True):
+        self.models = models
+        self.root = root or os.path.join(config.CACHE_DIR, 'jobs')
+        os.makedirs(self.root, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-job')
+        self._lock = threading.Lock()
+        self._active = set()
+        if resume:
+            self.resume_pending()
+    
+    def _job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+    
+    def _lease_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), 'lease.json')
+    
+    def _write_state(self, job):
+        job['updated'] = time.time()
+        path = os.path.join(self._job_dir(job['id']), 'job.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+        os.replace(path + '.tmp', path)
+    
+    def status(self, job_id):
+        with open(os.path.join(self._job_dir(job_id), 'job.json'), encoding='utf-8') as f:
+            return json.load(f)
+    
+    def list_jobs(self):
+        jobs = []
+        for path in glob.glob(os.path.join(self.root, '*', 'job.json')):
+            with open(path, encoding='utf-8') as f:
+                jobs.append(json.load(f))
+        return sorted(jobs, key=lambda job: job['created'], reverse=True)
+    
+    def submit(self, source, text_col, components=ALL_COMPONENTS, chunk_size=1024, batch_size=32, name=None):
+        """Copy the input into a new job directory, queue it and return the job id"""
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self._job_dir(job_id)
+        os.makedirs(os.path.join(job_dir, 'parts'))
+        
+        input_path = os.path.join(job_dir, 'input.csv')
+        if isinstance(source, str):
+            shutil.copyfile(source, input_path)
+        else:
+            with open(input_path, 'wb') as f:
+                shutil.copyfileobj(source, f)
+        
+        job = {
+            'id': job_id,
+            'name': name or job_id,
+            'status': 'queued',
+            'text_col': text_col,
+            'components': sorted(components),
+            'chunk_size': chunk_size,
+            'batch_size': batch_size,
+            'input_bytes': os.path.getsize(input_path),
+            'rows_done': 0,
+            'chunks_done': 0,
+            'error': None,
+            'created': time.time()
+        }
+        self._write_state(job)
+        self._schedule(job_id)
+        return job_id
+    
+    def resume_pending(self):
+        """Re-queue jobs left queued or running by a process that no longer holds their lease"""
+        for job in self.pending_jobs():
+            self._schedule(job['id'])
+    
+    def pending_jobs(self):
+        """Queued or running jobs that no live process is working on or has scheduled"""
+        with self._lock:
+            active = set(self._active)
+        return [
+            job for job in self.list_jobs()
+            if job['status'] in PENDING_STATUSES and job['id'] not in active
+            and not JobLease.is_live(self._lease_path(job['id']))
+        ]
+    
+    def resume(self, job_id):
+        job = self.status(job_id)
+        if job['status'] != 'done':
+            job['status'] = 'queued'
+            job['error'] = None
+            self._write_state(job)
+            self._schedule(job_id)
+    
+    def _schedule(self, job_id):
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active.add(job_id)
+        self._executor.submit(self._run, job_id)
+    
+    def _run(self, job_id):
+        lease = JobLease(self._lease_path(job_id))
+        if not lease.acquire():
+            # Another process is running this job
+            with self._lock:
+                self._active.discard(job_id)
+            return
+        
+        job = self.status(job_id)
+        job_dir = self._job_dir(job_id)
+        try:
+            if job['status'] == 'done':
+                return
+            job['status'] = 'running'
+            self._write_state(job)
+            
+            rows = 0
+            reader = pd.read_csv(os.path.join(job_dir, 'input.csv'), usecols=[job['text_col']], chunksize=job['chunk_size'])
+            for index, chunk in enumerate(reader):
+                part_path = os.path.join(job_dir, 'parts', f"part-{index:06d}.csv")
+                if not lease.held():
+                    # The lease was taken over after a stalled heartbeat
+                    return
+                if not os.path.exists(part_path):
+                    texts = chunk[job['text_col']].fillna('').astype(str).tolist()
+                    results = analyze_batch(texts, self.models, job['batch_size'], frozenset(job['components']), cache=False)
+                    frame = pd.DataFrame([result_record(result) for result in results])
+                    frame.insert(0, 'text', texts)
+                    frame.insert(0, 'row', range(rows, rows + len(texts)))
+                    frame.to_csv(part_path + '.tmp', index=False)
+                    os.replace(part_path + '.tmp', part_path)
+                
+                rows += len(chunk)
+                if rows > job['rows_done']:
+                    job['rows_done'] = rows
+                    job['chunks_done'] = index + 1
+                    self._write_state(job)
+            
+            job['status'] = 'done'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            if lease.held():
+                self._write_state(job)
+            lease.release()
+            with self._lock:
+                self._active.discard(job_id)
+    
+    def part_paths(self, job_id):
+        return sorted(glob.glob(os.path.join(self._job_dir(job_id), 'parts', 'part-*.csv')))
+    
+    def results(self, job_id):
+        """All results checkpointed so far (partial while the job runs)"""
+        parts = self.part_paths(job_id)
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat((pd.read_csv(path) for path in parts), ignore_index=True)
+    
+    def wait(self):
+        """Block until every scheduled job has finished"""
+        self._executor.shutdown(wait=True)
+
+def main():
+    from .models import load_models
+    manager = JobManager(load_models(), resume=False)
+    pending = manager.pending_jobs()
+    print(f"Processing {len(pending)} pending job(s) from {manager.root}")
+    manager.resume_pending()
+    manager.wait()
+
+if __name__ == '__main__':
+    main()
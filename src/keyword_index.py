@@ -0,0 +1,203 @@
+"""Inverted keyword index over a dataset's text column.
+
+Terms are lowercased word tokens (hashtags and mentions keep their ``#``/``@``).
+The index is three files under ``<CACHE_DIR>/keyword_index/<dataset>-<digest>/``,
+keyed by the dataset's fingerprint so it is rebuilt when the file changes:
+``terms.txt`` (sorted vocabulary), ``offsets.npy`` (int64, one slice per term)
+and ``postings.npy`` (uint32 row ids, sorted within each term). Because terms
+are sorted, a prefix query is one contiguous slice of the postings array.
+
+Queries AND together their clauses: ``word``, ``pre*`` (prefix) and
+``"exact phrase"``. Phrases are matched on the postings of their terms and
+then verified against the candidate rows' text.
+"""
+import bisect
+import hashlib
+import os
+import re
+import sys
+import time
+import numpy as np
+from . import config
+from .datasets import dataset_columns, file_fingerprint, iter_dataset_batches
+from .sampling import take_rows
+from .utils import find_text_column
+
+TOKEN_PATTERN = re.compile(r"[#@]?\w+")
+CLAUSE_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def phrase_pattern(terms):
+    """Regex matching ``terms`` as consecutive tokens of lowercased text"""
+    separator = r"(?:[^\w#@]|[#@](?!\w))+"
+    return re.compile(r"(?<![\w#@])" + separator.join(map(re.escape, terms)) + r"(?!\w)")
+
+def keyword_index_dir(dataset_path, text_col):
+    digest = hashlib.sha256(f"{file_fingerprint(dataset_path)}:{text_col}".encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return os.path.join(config.CACHE_DIR, 'keyword_index', f"{name}-{digest}")
+
+class KeywordIndex:
+    """Term -> sorted row ids, with keyword, prefix and phrase queries"""
+    
+    def __init__(self, terms, offsets, postings, dataset_path=None, text_col=None):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.dataset_path = dataset_path
+        self.text_col = text_col
+    
+    @classmethod
+    def build(cls, dataset_path, text_col, batch_size=65536):
+        """Tokenize the text column in one streaming pass and write the index files"""
+        vocab = {}
+        term_ids = []
+        row_ids = []
+        rows = 0
+        for batch in iter_dataset_batches(dataset_path, [text_col], batch_size):
+            batch_terms = []
+            batch_rows = []
+            for row, text in enumerate(batch[text_col].fillna('').astype(str), start=rows):
+                for term in set(tokenize(text)):
+                    batch_terms.append(vocab.setdefault(term, len(vocab)))
+                    batch_rows.append(row)
+            term_ids.append(np.asarray(batch_terms, dtype=np.int32))
+            row_ids.append(np.asarray(batch_rows, dtype=np.uint32))
+            rows += len(batch)
+        
+        terms = sorted(vocab)
+        # Renumber terms in sorted order so prefixes map to contiguous ranges
+        rank = np.empty(len(vocab), dtype=np.int32)
+        rank[[vocab[term] for term in terms]] = np.arange(len(terms), dtype=np.int32)
+        term_ids = rank[np.concatenate(term_ids)] if term_ids else np.empty(0, dtype=np.int32)
+        row_ids = np.concatenate(row_ids) if row_ids else np.empty(0, dtype=np.uint32)
+        order = np.argsort(term_ids, kind='stable')
+        postings = row_ids[order]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        
+        directory = keyword_index_dir(dataset_path, text_col)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'offsets.npy'), offsets)
+        np.save(os.path.join(directory, 'postings.npy'), postings)
+        with open(os.path.join(directory, 'terms.txt.tmp'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(terms))
+        # terms.txt is written last and marks a complete index
+        os.replace(os.path.join(directory, 'terms.txt.tmp'), os.path.join(directory, 'terms.txt'))
+        return cls(terms, offsets, postings, dataset_path, text_col)
+    
+    @classmethod
+    def load(cls, dataset_path, text_col):
+        """Memory-map a persisted index, or None if it has not been built for this file version"""
+        directory = keyword_index_dir(dataset_path, text_col)
+        terms_path = os.path.join(directory, 'terms.txt')
+        if not os.path.exists(terms_path):
+            return None
+        with open(terms_path, encoding='utf-8') as f:
+            content = f.read()
+        terms = content.split('\n') if content else []
+        offsets = np.load(os.path.join(directory, 'offsets.npy'), mmap_mode='r')
+        postings = np.load(os.path.join(directory, 'postings.npy'), mmap_mode='r')
+        return cls(terms, offsets, postings, dataset_path, text_col)
+    
+    @classmethod
+    def ensure(cls, dataset_path, text_col=None):
+        """Load the index for a dataset, building it first if needed"""
+        text_col = text_col or find_text_column(dataset_columns(dataset_path))
+        if text_col is None:
+            raise ValueError("No text column found in dataset")
+        return cls.load(dataset_path, text_col) or cls.build(dataset_path, text_col)
+    
+    def _slice(self, start, end):
+        return self.postings[self.offsets[start]:self.offsets[end]]
+    
+    def lookup(self, term):
+        """Rows containing ``term``"""
+        i = bisect.bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return np.asarray(self._slice(i, i + 1))
+        return np.empty(0, dtype=np.uint32)
+    
+    def prefix(self, prefix):
+        """Rows containing any term that starts with ``prefix``"""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '\uffff', lo=start)
+        if start == end:
+            return np.empty(0, dtype=np.uint32)
+        if end == start + 1:
+            return np.asarray(self._slice(start, end))
+        return np.unique(self._slice(start, end))
+    
+    def phrase(self, terms, texts=None):
+        """Rows containing ``terms`` consecutively.
+        
+        ``texts`` (anything with ``.iloc``, such as the loaded text column)
+        avoids reading candidate rows back from disk for verification.
+        """
+        rows = self._intersect([self.lookup(term) for term in terms])
+        if len(terms) < 2 or len(rows) == 0:
+            return rows
+        if texts is not None:
+            candidates = texts.iloc[rows]
+        else:
+            candidates = take_rows(self.dataset_path, rows, [self.text_col])[self.text_col]
+        keep = candidates.astype(str).str.lower().str.contains(phrase_pattern(terms), regex=True)
+        return rows[keep.to_numpy(dtype=bool)]
+    
+    @staticmethod
+    def _intersect(row_sets):
+        if not row_sets:
+            return np.empty(0, dtype=np.uint32)
+        row_sets = sorted(row_sets, key=len)
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            rows = rows[np.isin(rows, other, assume_unique=True)]
+        return rows
+    
+    def search(self, query, texts=None):
+        """Sorted row ids matching every clause of ``query``"""
+        row_sets = []
+        for quoted, word in CLAUSE_PATTERN.findall(query):
+            if quoted:
+                terms = tokenize(quoted)
+                if terms:
+                    row_sets.append(self.phrase(terms, texts))
+            elif word.endswith('*'):
+                terms = tokenize(word[:-1])
+                if terms:
+                    row_sets.append(self.prefix(terms[0]))
+            else:
+                terms = tokenize(word)
+                if len(terms) == 1:
+                    row_sets.append(self.lookup(terms[0]))
+                elif terms:
+                    row_sets.append(self.phrase(terms, texts))
+        return self._intersect(row_sets)
+
+def main():
+    import argparse
+    from .datasets import find_dataset_path
+    
+    parser = argparse.ArgumentParser(description="Build the keyword index and run a query against it")
+    parser.add_argument('query', nargs='?', help='words, pre* prefixes and "quoted phrases", all required')
+    parser.add_argument('--dataset', help="dataset path (default: the app's dataset)")
+    parser.add_argument('--text-column', help="text column (default: auto-detect)")
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    
+    dataset_path = args.dataset or find_dataset_path()
+    start = time.time()
+    index = KeywordIndex.ensure(dataset_path, args.text_column)
+    print(f"Index ready: {len(index.terms):,} terms, {len(index.postings):,} postings ({time.time() - start:.1f}s)", file=sys.stderr)
+    if args.query:
+        start = time.time()
+        rows = index.search(args.query)
+        print(f"{len(rows):,} matching rows ({(time.time() - start) * 1000:.1f} ms)", file=sys.stderr)
+        if len(rows):
+            for row, text in zip(rows[:args.limit], take_rows(dataset_path, rows[:args.limit], [index.text_col])[index.text_col]):
+                print(f"{row}\t{text}")
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,238 @@
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import pandas as pd
 import numpy as np
 from transformers import (
+    AutoConfig,
     AutoTokenizer, 
     AutoModelForSequenceClassification, 
     pipeline
 )
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from lime.lime_text import LimeTextExplainer
-import streamlit as st
+from . import config
+from .cache import PredictionCache, make_key
+from .dedup import deduplicate
+from .scheduler import MicroBatchScheduler
 
-@st.cache_resource
-def load_models():
-    """Load all models with caching"""
+logger = logging.getLogger(__name__)
+
+def sarcasm_error(message):
+    """Fallback sarcasm result carrying the error message"""
+    return {
+        'label': 'Error',
+        'confidence': 0.0,
+        'prob_not_sarcastic': 0.5,
+        'prob_sarcastic': 0.5,
+        'error': message
+    }
+
+def emotion_error(message):
+    """Fallback emotion result carrying the error message"""
+    return [{'label': 'neutral', 'score': 1.0, 'error': message}]
+
+def result_error(result):
+    """Error message of a sarcasm or emotion result, or None if it succeeded"""
+    if isinstance(result, dict):
+        return result.get('error')
+    if isinstance(result, list) and result:
+        return result[0].get('error')
+    return None
+
+def model_revision(model_config):
+    """Resolved hub commit of a model config, used to key cached predictions"""
+    return getattr(model_config, '_commit_hash', None) or 'main'
+
+def vader_revision():
     try:
-        models = {}
-        
-        sarcasm_model_name = "cardiffnlp/twitter-roberta-base-irony"
-        st.info(f"🔄 Loading sarcasm model ({sarcasm_model_name}) from HuggingFace...")
-        models['sarcasm_tokenizer'] = AutoTokenizer.from_pretrained(sarcasm_model_name)
-        models['sarcasm_model'] = AutoModelForSequenceClassification.from_pretrained(sarcasm_model_name)
-        
-        st.info("🔄 Loading emotion classifier...")
-        models['emotion_classifier'] = pipeline(
+        from importlib.metadata import version
+        return version('vaderSentiment')
+    except Exception:
+        return 'unknown'
+
+def create_explanation_cache():
+    """Build the persistent LIME/SHAP explanation store from config"""
+    return PredictionCache(
+        max_entries=config.EXPLANATION_CACHE_ENTRIES,
+        disk_path=os.path.join(config.CACHE_DIR, 'explanations.sqlite')
+    )
+
+def create_prediction_cache():
+    """Build the prediction cache from config"""
+    disk_path = os.path.join(config.CACHE_DIR, 'predictions.sqlite') if config.PREDICTION_CACHE_DISK else None
+    return PredictionCache(
+        max_entries=config.PREDICTION_CACHE_ENTRIES,
+        max_bytes=config.PREDICTION_CACHE_BYTES,
+        disk_path=disk_path
+    )
+
+def quantize_model(model):
+    """Apply dynamic int8 quantization to the linear layers of a model"""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_sarcasm_components(backend='torch', quantize=False):
+    """Load the sarcasm tokenizer and classifier for the given backend"""
+    logger.info("Loading sarcasm model (%s)", config.SARCASM_MODEL_NAME)
+    tokenizer = AutoTokenizer.from_pretrained(config.SARCASM_MODEL_NAME)
+    
+    if backend == 'onnx':
+        from .onnx_backend import ensure_onnx_model, OnnxSequenceClassifier
+        path, model_config = ensure_onnx_model(config.SARCASM_MODEL_NAME, config.CACHE_DIR, quantize)
+        model = OnnxSequenceClassifier(path, model_config, config.SARCASM_THREADS)
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(config.SARCASM_MODEL_NAME)
+        if quantize:
+            model = quantize_model(model)
+    
+    return {'sarcasm_tokenizer': tokenizer, 'sarcasm_model': model}
+
+def load_emotion_components(backend='torch', quantize=False):
+    """Load the GoEmotions classifier for the given backend"""
+    logger.info("Loading emotion classifier (%s)", config.EMOTION_MODEL_NAME)
+    
+    if backend == 'onnx':
+        from .onnx_backend import ensure_onnx_model, OnnxSequenceClassifier, OnnxTextClassifier
+        path, model_config = ensure_onnx_model(config.EMOTION_MODEL_NAME, config.CACHE_DIR, quantize)
+        classifier = OnnxTextClassifier(
+            AutoTokenizer.from_pretrained(config.EMOTION_MODEL_NAME),
+            OnnxSequenceClassifier(path, model_config, config.EMOTION_THREADS)
+        )
+    else:
+        classifier = pipeline(
             "text-classification",
-            model="SamLowe/roberta-base-go_emotions",
+            model=config.EMOTION_MODEL_NAME,
             top_k=None,
             device=0 if torch.cuda.is_available() else -1
         )
-        
-        models['vader'] = SentimentIntensityAnalyzer()
-        
-        models['lime_explainer'] = LimeTextExplainer(
+        if quantize:
+            classifier.model = quantize_model(classifier.model)
+    
+    return {'emotion_classifier': classifier}
+
+def load_model_ids(backend='torch', quantize=False):
+    """Model name and hub revision of every component, resolved from configs without loading weights"""
+    suffix = f"+{backend}" if backend != 'torch' else ''
+    suffix += '+int8' if quantize else ''
+    sarcasm_config = AutoConfig.from_pretrained(config.SARCASM_MODEL_NAME)
+    emotion_config = AutoConfig.from_pretrained(config.EMOTION_MODEL_NAME)
+    return {'model_ids': {
+        'sarcasm': f"{config.SARCASM_MODEL_NAME}@{model_revision(sarcasm_config)}{suffix}",
+        'emotion': f"{config.EMOTION_MODEL_NAME}@{model_revision(emotion_config)}{suffix}",
+        'vader': f"vader@{vader_revision()}"
+    }}
+
+class LazyModels(dict):
+    """Models dict whose components are loaded on first access.
+
+    Each key maps to a loader returning a dict of components, so related
+    components (e.g. the sarcasm tokenizer and model) load together. Loading
+    is guarded per loader, so concurrent sessions never load a model twice.
+    """
+    
+    def __init__(self, loaders, **values):
+        super().__init__(**values)
+        self._loaders = loaders
+        self._locks = {id(loader): threading.Lock() for loader in loaders.values()}
+    
+    def add_loader(self, keys, loader):
+        """Register a loader for keys after construction (e.g. one that needs the models dict itself)"""
+        self._locks[id(loader)] = threading.Lock()
+        for key in keys:
+            self._loaders[key] = loader
+    
+    def __missing__(self, key):
+        if key not in self._loaders:
+            raise KeyError(key)
+        loader = self._loaders[key]
+        with self._locks[id(loader)]:
+            if not dict.__contains__(self, key):
+                self.update(loader())
+        return dict.__getitem__(self, key)
+    
+    def get(self, key, default=None):
+        if dict.__contains__(self, key) or key in self._loaders:
+            return self[key]
+        return default
+    
+    def is_loaded(self, key):
+        return dict.__contains__(self, key)
+    
+    def prefetch(self, keys=None, background=True):
+        """Load components ahead of first use, optionally in a daemon thread"""
+        keys = list(keys or self._loaders)
+        def run():
+            for key in keys:
+                try:
+                    self[key]
+                except Exception as e:
+                    logger.warning("Prefetch of %s failed: %s", key, e)
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='model-prefetch', daemon=True)
+        thread.start()
+        return thread
+
+def create_schedulers(models):
+    """Micro-batching schedulers for both transformer models, shared by all sessions"""
+    def make(process_batch, name):
+        return MicroBatchScheduler(
+            process_batch,
+            max_batch=config.MICRO_BATCH_SIZE,
+            max_wait=config.MICRO_BATCH_WAIT_MS / 1000,
+            name=name
+        )
+    return {
+        'sarcasm_scheduler': make(
+            lambda texts: predict_sarcasm_batch(texts, models['sarcasm_tokenizer'], models['sarcasm_model'], config.MICRO_BATCH_SIZE),
+            'sarcasm-scheduler'
+        ),
+        'emotion_scheduler': make(
+            lambda texts: predict_emotion_batch(texts, models['emotion_classifier'], config.MICRO_BATCH_SIZE),
+            'emotion-scheduler'
+        )
+    }
+
+@functools.lru_cache(maxsize=None)
+def load_models(quantize=None, backend=None):
+    """Set up lazily loaded models; each component loads on first use"""
+    quantize = config.QUANTIZE if quantize is None else quantize
+    backend = backend or config.BACKEND
+    
+    if quantize and torch.cuda.is_available():
+        logger.warning("Int8 quantization is CPU-only, keeping fp32 models on GPU")
+        quantize = False
+    
+    if backend != 'onnx' and config.SARCASM_THREADS and config.EMOTION_THREADS:
+        torch.set_num_threads(config.SARCASM_THREADS + config.EMOTION_THREADS)
+    
+    sarcasm = lambda: load_sarcasm_components(backend, quantize)
+    emotion = lambda: load_emotion_components(backend, quantize)
+    loaders = {
+        'sarcasm_tokenizer': sarcasm,
+        'sarcasm_model': sarcasm,
+        'emotion_classifier': emotion,
+        'vader': lambda: {'vader': SentimentIntensityAnalyzer()},
+        'lime_explainer': lambda: {'lime_explainer': LimeTextExplainer(
             class_names=['Not Sarcastic', 'Sarcastic'],
             bow=False
-        )
-        
-        st.success("✅ All models loaded successfully!")
-        return models
-        
-    except Exception as e:
-        st.error(f"❌ Error loading models: {str(e)}")
-        return None
+        )},
+        'model_ids': lambda: load_model_ids(backend, quantize),
+        'prediction_cache': lambda: {'prediction_cache': create_prediction_cache()},
+        'explanation_cache': lambda: {'explanation_cache': create_explanation_cache()}
+    }
+    models = LazyModels(loaders, backend=backend, quantized=bool(quantize))
+    if config.MICRO_BATCHING:
+        models.add_loader(['sarcasm_scheduler', 'emotion_scheduler'], lambda: create_schedulers(models))
+    
+    if config.PREFETCH:
+        models.prefetch(config.PREFETCH)
+    return models
 
 def predict_sarcasm(text, tokenizer, model):
     """Predict sarcasm with confidence scores"""
@@ -60,13 +251,110 @@ def predict_sarcasm(text, tokenizer, model):
             'prob_sarcastic': probs[0][1].item()
         }
     except Exception as e:
-        st.error(f"Sarcasm prediction error: {e}")
-        return {
-            'label': 'Error',
-            'confidence': 0.0,
-            'prob_not_sarcastic': 0.5,
-            'prob_sarcastic': 0.5
+        logger.exception("Sarcasm prediction error")
+        return sarcasm_error(str(e))
+
+def _rows_to_results(probs):
+    """Convert a [n, 2] probability tensor into sarcasm result dicts"""
+    predictions = torch.argmax(probs, dim=1).tolist()
+    rows = probs.tolist()
+    return [
+        {
+            'label': 'Sarcastic' if prediction == 1 else 'Not Sarcastic',
+            'confidence': row[prediction],
+            'prob_not_sarcastic': row[0],
+            'prob_sarcastic': row[1]
         }
+        for prediction, row in zip(predictions, rows)
+    ]
+
+def _padded_batches(id_lists, pad_token_id, batch_size):
+    """Yield (indices, input_ids, attention_mask) for length-sorted batches padded to their longest sequence"""
+    order = sorted(range(len(id_lists)), key=lambda i: len(id_lists[i]))
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        max_len = max(len(id_lists[i]) for i in bucket)
+        input_ids = np.full((len(bucket), max_len), pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(bucket), max_len), dtype=np.int64)
+        for row, i in enumerate(bucket):
+            ids = id_lists[i]
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        yield bucket, torch.from_numpy(input_ids), torch.from_numpy(attention_mask)
+
+def score_token_ids(id_lists, model, pad_token_id, batch_size=32):
+    """Run the sarcasm model over pre-tokenized inputs in length-sorted padded batches.
+
+    Returns a [n, 2] probability tensor in the same order as ``id_lists``.
+    """
+    probs = torch.empty((len(id_lists), 2))
+    
+    with torch.no_grad():
+        for bucket, input_ids, attention_mask in _padded_batches(id_lists, pad_token_id, batch_size):
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask)
+            probs[bucket] = torch.softmax(outputs.logits, dim=1).float()
+    
+    return probs
+
+def embed_token_ids(id_lists, model, pad_token_id, batch_size=32):
+    """Sarcasm probabilities plus mean-pooled, L2-normalized final hidden states.
+
+    Returns ([n, 2] probability tensor, [n, hidden] float16 array), both in
+    input order. Needs the torch backend: the ONNX export only has logits.
+    """
+    if not hasattr(model, 'base_model'):
+        raise ValueError("Embeddings need the torch backend (SENTISARC_BACKEND=torch)")
+    probs = torch.empty((len(id_lists), 2))
+    embeddings = np.empty((len(id_lists), model.config.hidden_size), dtype=np.float16)
+    
+    with torch.no_grad():
+        for bucket, input_ids, attention_mask in _padded_batches(id_lists, pad_token_id, batch_size):
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+            probs[bucket] = torch.softmax(outputs.logits, dim=1).float()
+            mask = attention_mask.unsqueeze(-1).float()
+            pooled = (outputs.hidden_states[-1].float() * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            embeddings[bucket] = torch.nn.functional.normalize(pooled, dim=1).numpy().astype(np.float16)
+    
+    return probs, embeddings
+
+def tokenize_texts(texts, tokenizer, token_ids=None):
+    """Token ids for ``texts``, reusing pre-tokenized ``token_ids`` entries that are not None"""
+    if token_ids is None:
+        return tokenizer(texts, truncation=True, max_length=512)['input_ids']
+    id_lists = list(token_ids)
+    missing = [i for i, ids in enumerate(id_lists) if ids is None]
+    if missing:
+        encoded = tokenizer([texts[i] for i in missing], truncation=True, max_length=512)['input_ids']
+        for i, ids in zip(missing, encoded):
+            id_lists[i] = ids
+    return id_lists
+
+def predict_sarcasm_batch(texts, tokenizer, model, batch_size=32, token_ids=None):
+    """Predict sarcasm for many texts with length-bucketed dynamic padding.
+
+    Texts are tokenized in a single call (or taken from ``token_ids``, e.g.
+    views into a ``TokenCache``), sorted by token length and run in batches
+    padded only to the longest sequence of each batch. Results are returned
+    in the original order, in the same format as ``predict_sarcasm``.
+    """
+    texts = [str(t) for t in texts]
+    if not texts:
+        return []
+    try:
+        id_lists = tokenize_texts(texts, tokenizer, token_ids)
+        probs = score_token_ids(id_lists, model, tokenizer.pad_token_id, batch_size)
+        return _rows_to_results(probs)
+    except Exception as e:
+        logger.exception("Sarcasm prediction error")
+        return [sarcasm_error(str(e)) for _ in texts]
+
+def embed_texts(texts, models, batch_size=32, token_ids=None):
+    """Sarcasm results and pooled sarcasm-model embeddings for ``texts``"""
+    texts = [str(t) for t in texts]
+    tokenizer = models['sarcasm_tokenizer']
+    id_lists = tokenize_texts(texts, tokenizer, token_ids)
+    probs, embeddings = embed_token_ids(id_lists, models['sarcasm_model'], tokenizer.pad_token_id, batch_size)
+    return _rows_to_results(probs), embeddings
 
 def predict_emotion(text, classifier):
     """Predict emotions with full GoEmotions label set"""
@@ -75,22 +363,213 @@ def predict_emotion(text, classifier):
         results = sorted(results, key=lambda x: x['score'], reverse=True)
         return results
     except Exception as e:
-        st.error(f"Emotion prediction error: {e}")
-        return [{'label': 'neutral', 'score': 1.0}]
+        logger.exception("Emotion prediction error")
+        return emotion_error(str(e))
+
+def predict_emotion_batch(texts, classifier, batch_size=32):
+    """Predict emotions for many texts, batching through the pipeline"""
+    texts = [str(t) for t in texts]
+    if not texts:
+        return []
+    try:
+        outputs = classifier(texts, batch_size=batch_size, truncation=True, max_length=512)
+        return [sorted(results, key=lambda x: x['score'], reverse=True) for results in outputs]
+    except Exception as e:
+        logger.exception("Emotion prediction error")
+        return [emotion_error(str(e)) for _ in texts]
+
+def emotion_labels(models):
+    """Label names of the loaded emotion classifier"""
+    classifier = models['emotion_classifier']
+    id2label = getattr(classifier, 'id2label', None) or classifier.model.config.id2label
+    return [id2label[i] for i in sorted(id2label)]
 
 def get_vader_sentiment(text, vader):
     """Get VADER sentiment scores"""
     scores = vader.polarity_scores(text)
     return scores
 
-def analyze_text(text, models):
-    """Complete text analysis"""
-    sarcasm_result = predict_sarcasm(text, models['sarcasm_tokenizer'], models['sarcasm_model'])
-    emotion_results = predict_emotion(text, models['emotion_classifier'])
-    vader_scores = get_vader_sentiment(text, models['vader'])
+def cached_predictions(models, kind, texts, compute, use_cache=True):
+    """Look texts up in the prediction cache and run ``compute`` on the misses only.
+
+    ``compute`` takes a list of texts and returns one result per text. Error
+    fallbacks are never cached. With ``use_cache`` off the cache is neither
+    read nor written.
+    """
+    cache = models.get('prediction_cache') if use_cache else None
+    if cache is None:
+        return compute(texts)
+    
+    model_id = models['model_ids'][kind]
+    keys = [make_key(kind, text, model_id) for text in texts]
+    results = cache.get_many(keys)
+    missing = [i for i, result in enumerate(results) if result is None]
+    
+    if missing:
+        computed = compute([texts[i] for i in missing])
+        for i, result in zip(missing, computed):
+            results[i] = result
+        cache.set_many((keys[i], results[i]) for i in missing if result_error(results[i]) is None)
+    
+    return results
+
+ALL_COMPONENTS = frozenset({'sarcasm', 'emotion', 'vader'})
+
+def select_components(show_emotions=True, show_vader=True):
+    """Components to compute for the sidebar settings (sarcasm is always on)"""
+    components = {'sarcasm'}
+    if show_emotions:
+        components.add('emotion')
+    if show_vader:
+        components.add('vader')
+    return frozenset(components)
+
+def analyze_text(text, models, components=ALL_COMPONENTS, parallel=None):
+    """Complete text analysis
+
+    Only the requested ``components`` are computed; the others are None.
+    Per-stage wall times in seconds are returned under ``'timings'``.
+    """
+    timings = {}
+    result = analyze_batch([text], models, components=components, parallel=parallel, timings=timings)[0]
+    result['timings'] = timings
+    return result
+
+def analyze_batch(texts, models, batch_size=32, components=ALL_COMPONENTS, parallel=None, timings=None, dedupe=None, token_ids=None, cache=True):
+    """Complete text analysis for a list of texts using batched inference
+
+    Calls smaller than a batch go through the shared micro-batching schedulers
+    (when enabled), so concurrent sessions are coalesced into one forward pass.
+    The sarcasm, emotion and VADER stages are independent and run
+    concurrently when ``parallel`` (default ``config.PARALLEL_STAGES``) is
+    set; PyTorch and ONNX Runtime release the GIL inside their kernels. If a
+    ``timings`` dict is passed it receives each stage's wall time in seconds.
+    Duplicates (``dedupe``, default ``config.DEDUPE``) are scored once and
+    fanned back out to every row. ``token_ids`` (sarcasm-tokenizer ids per
+    text, e.g. from a ``TokenCache``) skips re-tokenizing for the sarcasm model.
+    A model that fails to load yields error results for its stage, as a
+    failed prediction does. Bulk callers pass ``cache=False`` so one-off
+    passes over many rows skip the prediction cache instead of evicting the
+    interactive warm set.
+    """
+    texts = [str(t) for t in texts]
+    ids_by_text = dict(zip(texts, token_ids)) if token_ids is not None else None
+    dedupe = config.DEDUPE if dedupe is None else dedupe
+    if dedupe != 'off' and len(texts) > 1:
+        unique_texts, index = deduplicate(texts, config.DEDUPE_LOWERCASE, near_duplicates=dedupe == 'near')
+        if len(unique_texts) < len(texts):
+            unique_ids = [ids_by_text[t] for t in unique_texts] if ids_by_text is not None else None
+            unique_results = analyze_batch(unique_texts, models, batch_size, components, parallel, timings, dedupe='off', token_ids=unique_ids, cache=cache)
+            return [unique_results[i] for i in index]
+    
+    parallel = config.PARALLEL_STAGES if parallel is None else parallel
+    sarcasm_scheduler = models.get('sarcasm_scheduler')
+    emotion_scheduler = models.get('emotion_scheduler')
+    stages = {
+        'sarcasm': lambda: cached_predictions(
+            models, 'sarcasm', texts,
+            lambda miss: sarcasm_scheduler.map(miss) if sarcasm_scheduler is not None and len(miss) < batch_size
+            else predict_sarcasm_batch(
+                miss, models['sarcasm_tokenizer'], models['sarcasm_model'], batch_size,
+                [ids_by_text.get(t) for t in miss] if ids_by_text is not None else None
+            ),
+            cache
+        ),
+        'emotion': lambda: cached_predictions(
+            models, 'emotion', texts,
+            lambda miss: emotion_scheduler.map(miss) if emotion_scheduler is not None and len(miss) < batch_size
+            else predict_emotion_batch(miss, models['emotion_classifier'], batch_size),
+            cache
+        ),
+        'vader': lambda: cached_predictions(
+            models, 'vader', texts,
+            lambda miss: [get_vader_sentiment(t, models['vader']) for t in miss],
+            cache
+        )
+    }
+    stages = {name: stage for name, stage in stages.items() if name in components}
+    
+    fallbacks = {'sarcasm': sarcasm_error, 'emotion': emotion_error}
+    
+    def timed(name):
+        start = time.perf_counter()
+        try:
+            output = stages[name]()
+        except Exception as e:
+            # Lazily loaded components (models, model ids) can fail on first access
+            if name not in fallbacks:
+                raise
+            logger.exception("Loading the %s model failed", name)
+            output = [fallbacks[name](str(e)) for _ in texts]
+        return output, time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if parallel and len(stages) > 1:
+        # The first stage runs in the calling thread; the others get threads of
+        # their own, so a long bulk call never queues in front of another caller
+        first, *rest = stages
+        with ThreadPoolExecutor(max_workers=len(rest), thread_name_prefix='analysis-stage') as executor:
+            futures = {name: executor.submit(timed, name) for name in rest}
+            outputs = {first: timed(first)}
+            outputs.update((name, future.result()) for name, future in futures.items())
+    else:
+        outputs = {name: timed(name) for name in stages}
+    
+    if timings is not None:
+        timings.update({name: elapsed for name, (_, elapsed) in outputs.items()})
+        timings['total'] = time.perf_counter() - start
+    
+    skipped = (None, 0.0)
+    sarcasm_results = outputs.get('sarcasm', skipped)[0] or [None] * len(texts)
+    emotion_results = outputs.get('emotion', skipped)[0] or [None] * len(texts)
+    vader_results = outputs.get('vader', skipped)[0] or [None] * len(texts)
+    
+    return [
+        {
+            'sarcasm': sarcasm_result,
+            'emotions': emotions,
+            'vader': vader_scores
+        }
+        for sarcasm_result, emotions, vader_scores in zip(sarcasm_results, emotion_results, vader_results)
+    ]
+
+def check_quantization_agreement(texts, models, batch_size=32):
+    """Compare quantized models against freshly loaded fp32 weights on a reference set.
+
+    Returns the label-flip rate and the max/mean absolute probability delta
+    for both the sarcasm model and the emotion classifier.
+    """
+    texts = [str(t) for t in texts]
+    reference_sarcasm = AutoModelForSequenceClassification.from_pretrained(config.SARCASM_MODEL_NAME)
+    reference_emotion = pipeline(
+        "text-classification",
+        model=config.EMOTION_MODEL_NAME,
+        top_k=None,
+        device=-1
+    )
+    
+    tokenizer = models['sarcasm_tokenizer']
+    encoded = tokenizer(texts, truncation=True, max_length=512)['input_ids']
+    fp32_probs = score_token_ids(encoded, reference_sarcasm, tokenizer.pad_token_id, batch_size)
+    int8_probs = score_token_ids(encoded, models['sarcasm_model'], tokenizer.pad_token_id, batch_size)
+    sarcasm_delta = (fp32_probs - int8_probs).abs()
+    sarcasm_flips = (fp32_probs.argmax(dim=1) != int8_probs.argmax(dim=1)).float()
+    
+    fp32_emotions = predict_emotion_batch(texts, reference_emotion, batch_size)
+    int8_emotions = predict_emotion_batch(texts, models['emotion_classifier'], batch_size)
+    emotion_flips = []
+    emotion_deltas = []
+    for fp32_result, int8_result in zip(fp32_emotions, int8_emotions):
+        emotion_flips.append(fp32_result[0]['label'] != int8_result[0]['label'])
+        int8_scores = {item['label']: item['score'] for item in int8_result}
+        emotion_deltas.extend(abs(item['score'] - int8_scores.get(item['label'], 0.0)) for item in fp32_result)
     
     return {
-        'sarcasm': sarcasm_result,
-        'emotions': emotion_results,
-        'vader': vader_scores
+        'n_texts': len(texts),
+        'sarcasm_flip_rate': sarcasm_flips.mean().item() if texts else 0.0,
+        'sarcasm_max_prob_delta': sarcasm_delta.max().item() if texts else 0.0,
+        'sarcasm_mean_prob_delta': sarcasm_delta.mean().item() if texts else 0.0,
+        'emotion_top_flip_rate': float(np.mean(emotion_flips)) if emotion_flips else 0.0,
+        'emotion_max_prob_delta': float(np.max(emotion_deltas)) if emotion_deltas else 0.0,
+        'emotion_mean_prob_delta': float(np.mean(emotion_deltas)) if emotion_deltas else 0.0
     }
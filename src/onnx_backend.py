@@ -0,0 +1,117 @@
+import inspect
+import os
+from types import SimpleNamespace
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+def onnx_model_path(cache_dir, model_name, revision, quantized=False):
+    """Location of the cached ONNX graph for a model name and revision"""
+    safe_name = model_name.replace('/', '__')
+    suffix = '.int8.onnx' if quantized else '.onnx'
+    return os.path.join(cache_dir, 'onnx', f"{safe_name}@{revision}{suffix}")
+
+def export_to_onnx(model_name, path):
+    """Export a sequence classifier to ONNX with dynamic batch and sequence axes"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    dummy = torch.ones((2, 8), dtype=torch.long)
+    tmp_path = path + '.tmp'
+    # Recent torch defaults to the dynamo exporter, which handles dynamic_axes
+    # differently; keep the TorchScript exporter where the choice exists
+    export_kwargs = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    torch.onnx.export(
+        model,
+        (dummy, dummy),
+        tmp_path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'logits': {0: 'batch'}
+        },
+        opset_version=14,
+        **export_kwargs
+    )
+    os.replace(tmp_path, path)
+    return path
+
+def quantize_onnx(source_path, path):
+    """Dynamic int8 quantization of an exported ONNX graph"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(source_path, path, weight_type=QuantType.QInt8)
+    return path
+
+def ensure_onnx_model(model_name, cache_dir, quantized=False):
+    """Return (path, config) of the cached ONNX graph, exporting it on first use"""
+    model_config = AutoConfig.from_pretrained(model_name)
+    revision = getattr(model_config, '_commit_hash', None) or 'main'
+    fp32_path = onnx_model_path(cache_dir, model_name, revision)
+    if not os.path.exists(fp32_path):
+        export_to_onnx(model_name, fp32_path)
+    if not quantized:
+        return fp32_path, model_config
+    
+    int8_path = onnx_model_path(cache_dir, model_name, revision, quantized=True)
+    if not os.path.exists(int8_path):
+        quantize_onnx(fp32_path, int8_path)
+    return int8_path, model_config
+
+def create_session(path, intra_op_threads=0):
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError("The ONNX backend requires onnxruntime (pip install onnxruntime)") from e
+    
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    return ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime session with the call interface of a transformers classifier"""
+    
+    def __init__(self, path, model_config, intra_op_threads=0):
+        self.path = path
+        self.config = model_config
+        self.session = create_session(path, intra_op_threads)
+    
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        logits = self.session.run(['logits'], {
+            'input_ids': np.asarray(input_ids, dtype=np.int64),
+            'attention_mask': np.asarray(attention_mask, dtype=np.int64)
+        })[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+    
+    def eval(self):
+        return self
+
+class OnnxTextClassifier:
+    """Drop-in replacement for a ``text-classification`` pipeline with ``top_k=None``"""
+    
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.id2label = model.config.id2label
+        self.multi_label = model.config.problem_type == 'multi_label_classification'
+    
+    def __call__(self, texts, batch_size=32, truncation=True, max_length=512):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                truncation=truncation,
+                max_length=max_length,
+                padding=True,
+                return_tensors='np'
+            )
+            logits = self.model(inputs['input_ids'], inputs['attention_mask']).logits
+            scores = torch.sigmoid(logits) if self.multi_label else torch.softmax(logits, dim=1)
+            for row in scores.tolist():
+                outputs.append([{'label': self.id2label[i], 'score': score} for i, score in enumerate(row)])
+        return [outputs[0]] if single else outputs
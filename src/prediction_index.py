@@ -0,0 +1,203 @@
+"""Precomputed predictions for the whole configured dataset.
+
+The index is a columnar sidecar under ``<CACHE_DIR>/index/<dataset>/``:
+``manifest.json`` records the model ids, text column and how many rows are
+indexed, and ``parts/part-NNNNNN.parquet`` hold the scores for consecutive
+row ranges (``row`` is the position in the dataset). Updates are
+incremental: rows appended to the dataset are scored on the next build,
+while a model revision change, a different text column or edited leading
+rows start the index over. Run ``python -m src.prediction_index`` to build
+it outside the app.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+from . import config
+from .datasets import dataset_columns, find_dataset_path, iter_dataset_batches
+from .models import analyze_batch, ALL_COMPONENTS
+from .results import result_record
+from .token_cache import dataset_token_cache
+from .utils import find_text_column
+
+# Leading rows whose digest detects an edited (rather than appended) dataset
+PREFIX_ROWS = 1024
+
+INDEX_COLUMNS = ['row', 'sarcasm_label', 'prob_sarcastic', 'top_emotion', 'vader_compound']
+
+def index_dir(dataset_path):
+    digest = hashlib.sha256(os.path.abspath(dataset_path).encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return os.path.join(config.CACHE_DIR, 'index', f"{name}-{digest}")
+
+def _prefix_digest(texts):
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _read_prefix(dataset_path, text_col, n):
+    texts = []
+    for batch in iter_dataset_batches(dataset_path, [text_col], n):
+        texts.extend(batch[text_col].fillna('').astype(str).tolist()[:n - len(texts)])
+        if len(texts) >= n:
+            break
+    return texts
+
+def load_manifest(dataset_path):
+    path = os.path.join(index_dir(dataset_path), 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_manifest(directory, manifest):
+    manifest['updated'] = time.time()
+    path = os.path.join(directory, 'manifest.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+def _reset(directory, text_col, model_ids):
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(os.path.join(directory, 'parts'))
+    manifest = {'text_col': text_col, 'model_ids': model_ids, 'rows': 0, 'parts': 0,
+                'prefix_rows': 0, 'prefix_digest': None}
+    _write_manifest(directory, manifest)
+    return manifest
+
+def index_frame(rows, texts, results):
+    """Compact index rows: categorical labels, float32 headline scores, float16 per-emotion scores"""
+    frame = pd.DataFrame([result_record(result) for result in results])
+    frame.insert(0, 'row', np.arange(rows, rows + len(texts), dtype=np.int64))
+    frame = frame[[col for col in frame.columns if col in INDEX_COLUMNS or col.startswith('emotion_')]]
+    for col in frame.columns:
+        if col in ('sarcasm_label', 'top_emotion'):
+            frame[col] = frame[col].astype('category')
+        elif col.startswith('emotion_'):
+            frame[col] = frame[col].astype(np.float16)
+        elif col != 'row':
+            frame[col] = frame[col].astype(np.float32)
+    return frame
+
+def is_stale(manifest, models):
+    return manifest is None or manifest['model_ids'] != dict(models['model_ids'])
+
+def build_index(models, dataset_path=None, text_col=None, chunk_size=4096, batch_size=32, progress=None):
+    """Score the rows not yet in the index; returns the manifest.
+    
+    ``progress(rows_indexed, rows_scored)`` is called after every written part.
+    """
+    dataset_path = dataset_path or find_dataset_path()
+    if dataset_path is None:
+        raise FileNotFoundError("No dataset found")
+    text_col = text_col or find_text_column(dataset_columns(dataset_path))
+    if text_col is None:
+        raise ValueError("No text column found in dataset")
+    
+    directory = index_dir(dataset_path)
+    model_ids = dict(models['model_ids'])
+    manifest = load_manifest(dataset_path)
+    if is_stale(manifest, models) or manifest['text_col'] != text_col:
+        manifest = _reset(directory, text_col, model_ids)
+    
+    prefix = _read_prefix(dataset_path, text_col, PREFIX_ROWS)
+    if manifest['prefix_digest'] is not None and (
+            len(prefix) < manifest['prefix_rows']
+            or _prefix_digest(prefix[:manifest['prefix_rows']]) != manifest['prefix_digest']):
+        manifest = _reset(directory, text_col, model_ids)
+    if manifest['prefix_digest'] is None:
+        manifest['prefix_rows'] = len(prefix)
+        manifest['prefix_digest'] = _prefix_digest(prefix)
+    
+    token_cache = dataset_token_cache(models, dataset_path, text_col)
+    rows = 0
+    scored = 0
+    for batch in iter_dataset_batches(dataset_path, [text_col], chunk_size):
+        texts = batch[text_col].fillna('').astype(str).tolist()
+        start = max(manifest['rows'] - rows, 0)
+        if start < len(texts):
+            new_texts = texts[start:]
+            token_ids = token_cache.range(rows + start, rows + len(texts)) if token_cache is not None and len(token_cache) >= rows + len(texts) else None
+            results = analyze_batch(new_texts, models, batch_size, ALL_COMPONENTS, token_ids=token_ids, cache=False)
+            part_path = os.path.join(directory, 'parts', f"part-{manifest['parts']:06d}.parquet")
+            index_frame(rows + start, new_texts, results).to_parquet(part_path + '.tmp', index=False)
+            os.replace(part_path + '.tmp', part_path)
+            manifest['rows'] = rows + len(texts)
+            manifest['parts'] += 1
+            _write_manifest(directory, manifest)
+            scored += len(new_texts)
+            if progress:
+                progress(manifest['rows'], scored)
+        rows += len(texts)
+    
+    if rows < manifest['rows']:
+        # The dataset shrank, so indexed rows no longer line up
+        _reset(directory, text_col, model_ids)
+        return build_index(models, dataset_path, text_col, chunk_size, batch_size, progress)
+    return manifest
+
+def load_index(dataset_path=None):
+    """The whole index as one DataFrame ordered by row, or None if not built"""
+    dataset_path = dataset_path or find_dataset_path()
+    if dataset_path is None:
+        return None
+    parts = sorted(glob.glob(os.path.join(index_dir(dataset_path), 'parts', 'part-*.parquet')))
+    if not parts:
+        return None
+    frame = pd.concat((pd.read_parquet(path) for path in parts), ignore_index=True)
+    for col in ('sarcasm_label', 'top_emotion'):
+        if col in frame:
+            frame[col] = frame[col].astype('category')
+    return frame
+
+def filter_index(frame, label=None, min_prob=0.0, emotion=None, min_emotion=0.0, vader_range=(-1.0, 1.0)):
+    """Boolean mask over the index, e.g. sarcastic tweets with anger above 0.5"""
+    mask = frame['prob_sarcastic'].to_numpy() >= min_prob
+    if label is not None:
+        mask &= (frame['sarcasm_label'] == label).to_numpy()
+    if emotion is not None:
+        mask &= frame[f"emotion_{emotion}"].to_numpy() >= min_emotion
+    if 'vader_compound' in frame:
+        vader = frame['vader_compound'].to_numpy()
+        mask &= (vader >= vader_range[0]) & (vader <= vader_range[1])
+    return mask
+
+def top_matches(frame, column, n=100):
+    """The ``n`` rows with the highest ``column`` (works on float16 columns, unlike nlargest)"""
+    values = frame[column].to_numpy(dtype=np.float32)
+    if len(values) > n:
+        order = np.argpartition(-values, n)[:n]
+        order = order[np.argsort(-values[order], kind='stable')]
+    else:
+        order = np.argsort(-values, kind='stable')
+    return frame.iloc[order]
+
+def main():
+    import argparse
+    from .models import load_models
+    
+    parser = argparse.ArgumentParser(description="Build or update the prediction index for the configured dataset")
+    parser.add_argument('dataset', nargs='?', help="dataset path (default: the app's dataset)")
+    parser.add_argument('--text-column', help="text column (default: auto-detect)")
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    
+    start = time.time()
+    
+    def report(indexed, scored):
+        elapsed = time.time() - start
+        print(f"{indexed:,} rows indexed, {scored:,} scored ({scored / elapsed:.1f} rows/s)", file=sys.stderr)
+    
+    manifest = build_index(load_models(), args.dataset, args.text_column, args.chunk_size, args.batch_size, report)
+    print(f"Index up to date: {manifest['rows']:,} rows")
+
+if __name__ == '__main__':
+    main()
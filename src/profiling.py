@@ -0,0 +1,131 @@
+"""Dataset profile for the explorer: built in one streaming pass, cached by fingerprint.
+
+Per column: dtype, null count, approximate distinct count (HyperLogLog) and
+the most frequent values (mergeable Misra-Gries summary, so counts are lower
+bounds within ``rows / capacity`` of the truth). The text column also gets a
+character-length histogram. Profiles are small JSON files under
+``<CACHE_DIR>/profiles/`` and are rebuilt when the dataset file changes.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from . import config
+from .datasets import file_fingerprint, iter_dataset_batches
+from .utils import find_text_column
+
+HLL_PRECISION = 14
+LENGTH_BIN_WIDTH = 10
+LENGTH_MAX = 500
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes (about 1% error at precision 14)"""
+    
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = (hashes << np.uint64(self.precision)) | np.uint64(1 << (self.precision - 1))
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = (64 - np.floor(np.log2(rest.astype(np.float64)))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+    
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+class HeavyHitters:
+    """Misra-Gries frequent-items summary with ``capacity`` counters, merged batch by batch"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+    
+    def add_counts(self, counts):
+        merged = self.counts.add(counts, fill_value=0)
+        if len(merged) > self.capacity:
+            merged = merged.nlargest(self.capacity + 1)
+            merged = merged.iloc[:self.capacity] - merged.iloc[self.capacity]
+            merged = merged[merged > 0]
+        self.counts = merged.astype(np.int64)
+    
+    def top(self, k):
+        return self.counts.nlargest(k)
+
+def profile_path(dataset_path):
+    digest = hashlib.sha256(file_fingerprint(dataset_path).encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return os.path.join(config.CACHE_DIR, 'profiles', f"{name}-{digest}.json")
+
+def build_profile(dataset_path, top_k=10, batch_size=65536):
+    """Profile every column of a dataset in one streaming pass"""
+    rows = 0
+    columns = {}
+    sketches = {}
+    text_col = None
+    length_counts = np.zeros(LENGTH_MAX // LENGTH_BIN_WIDTH + 1, dtype=np.int64)
+    length_sum = 0
+    length_n = 0
+    for batch in iter_dataset_batches(dataset_path, batch_size=batch_size):
+        if not columns:
+            text_col = find_text_column(batch.columns)
+            for col in batch.columns:
+                columns[col] = {'dtype': str(batch[col].dtype), 'nulls': 0}
+                sketches[col] = (HyperLogLog(), HeavyHitters(max(64, 10 * top_k)))
+        rows += len(batch)
+        for col in columns:
+            values = batch[col]
+            columns[col]['nulls'] += int(values.isna().sum())
+            values = values.dropna()
+            if values.empty:
+                continue
+            hll, heavy = sketches[col]
+            hll.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+            counts = values.value_counts(sort=False)
+            heavy.add_counts(counts[counts > 0])
+            if col == text_col:
+                lengths = values.astype(str).str.len().to_numpy()
+                length_sum += int(lengths.sum())
+                length_n += len(lengths)
+                bins = np.minimum(lengths // LENGTH_BIN_WIDTH, len(length_counts) - 1)
+                length_counts += np.bincount(bins, minlength=len(length_counts))
+    
+    for col, stats in columns.items():
+        hll, heavy = sketches[col]
+        non_null = rows - stats['nulls']
+        stats['null_rate'] = stats['nulls'] / rows if rows else 0.0
+        stats['distinct'] = min(hll.count(), non_null)
+        stats['top_values'] = [[str(value), int(count)] for value, count in heavy.top(top_k).items()]
+    
+    return {
+        'rows': rows,
+        'columns': columns,
+        'text_col': text_col,
+        'avg_text_length': length_sum / length_n if length_n else None,
+        'text_length_histogram': {
+            'bin_width': LENGTH_BIN_WIDTH,
+            'counts': length_counts.tolist()
+        } if text_col else None
+    }
+
+def dataset_profile(dataset_path, top_k=10):
+    """Cached profile of the current version of a dataset, built on first use"""
+    path = profile_path(dataset_path)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    profile = build_profile(dataset_path, top_k)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(profile, f)
+    os.replace(path + '.tmp', path)
+    return profile
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from .utils import get_emotion_emoji
+
+VADER_FIELDS = ['neg', 'neu', 'pos', 'compound']
+SARCASM_FIELDS = ['sarcasm_label', 'confidence', 'prob_sarcastic', 'prob_not_sarcastic']
+
+def result_record(result):
+    """Flatten one analysis result into numeric columns.
+
+    Skipped components (None) contribute no columns. Emotion scores become
+    ``emotion_<label>`` (in label order, so chunks line up) and VADER scores
+    ``vader_<name>``.
+    """
+    record = {}
+    if result['sarcasm'] is not None:
+        record['sarcasm_label'] = result['sarcasm']['label']
+        record['confidence'] = result['sarcasm']['confidence']
+        record['prob_sarcastic'] = result['sarcasm']['prob_sarcastic']
+        record['prob_not_sarcastic'] = result['sarcasm']['prob_not_sarcastic']
+    if result['emotions'] is not None:
+        record['top_emotion'] = result['emotions'][0]['label']
+        record['top_emotion_score'] = result['emotions'][0]['score']
+        record.update({f"emotion_{item['label']}": item['score'] for item in sorted(result['emotions'], key=lambda x: x['label'])})
+    if result['vader'] is not None:
+        record.update({f"vader_{name}": result['vader'][name] for name in VADER_FIELDS})
+    return record
+
+def result_columns(emotion_labels, components=('sarcasm', 'emotion', 'vader')):
+    """Fixed column order of ``result_record`` output for the given components.
+
+    Appended outputs (CSV chunks, Parquet row groups) are reindexed to this
+    list so every chunk matches the header, even when a row is an error
+    fallback with fewer emotion scores.
+    """
+    columns = []
+    if 'sarcasm' in components:
+        columns += SARCASM_FIELDS
+    if 'emotion' in components:
+        columns += ['top_emotion', 'top_emotion_score'] + [f"emotion_{label}" for label in sorted(emotion_labels)]
+    if 'vader' in components:
+        columns += [f"vader_{name}" for name in VADER_FIELDS]
+    return columns
+
+def records_frame(records, columns):
+    """Records as a DataFrame with exactly ``columns``, in that order, with stable dtypes"""
+    frame = pd.DataFrame(records).reindex(columns=columns)
+    for col in columns:
+        frame[col] = frame[col].astype('string' if col in ('sarcasm_label', 'top_emotion') else np.float64)
+    return frame
+
+def results_to_frame(texts, results):
+    """Typed columnar table of analysis results: float32 scores, categorical labels"""
+    frame = pd.DataFrame([result_record(result) for result in results])
+    frame.insert(0, 'text', pd.Series(list(texts), dtype='string'))
+    return compact_result_dtypes(frame)
+
+def compact_result_dtypes(frame):
+    for col in frame.columns:
+        if col in ('sarcasm_label', 'top_emotion'):
+            frame[col] = frame[col].astype('category')
+        elif col.startswith(('emotion_', 'vader_', 'prob_')) or col in ('confidence', 'top_emotion_score'):
+            frame[col] = frame[col].astype(np.float32)
+    return frame
+
+def emotion_columns(frame):
+    return [col for col in frame.columns if col.startswith('emotion_')]
+
+def summarize_results(frame):
+    """Vectorized summary statistics over a results table"""
+    n = len(frame)
+    summary = {'n': n}
+    if 'sarcasm_label' in frame:
+        sarcastic = int((frame['sarcasm_label'] == 'Sarcastic').sum())
+        summary['sarcastic_count'] = sarcastic
+        summary['sarcastic_rate'] = sarcastic / n if n else 0.0
+        # Error fallbacks carry placeholder scores, so they stay out of the averages
+        scored = frame[(frame['sarcasm_label'] != 'Error').to_numpy()]
+        summary['avg_confidence'] = float(scored['confidence'].mean()) if len(scored) else 0.0
+        summary['avg_prob_sarcastic'] = float(scored['prob_sarcastic'].mean()) if len(scored) else 0.0
+    if 'vader_compound' in frame:
+        summary['avg_vader'] = float(frame['vader_compound'].mean()) if n else 0.0
+    if 'top_emotion' in frame and n:
+        counts = frame['top_emotion'].value_counts()
+        summary['top_emotion'] = counts.index[0]
+        summary['top_emotion_counts'] = counts[counts > 0]
+        cols = emotion_columns(frame)
+        scores = frame[cols].astype(np.float64)
+        # Emotion error fallbacks only score 'neutral'; leave them out when full rows exist
+        complete = scores.notna().all(axis=1)
+        means = (scores[complete] if complete.any() else scores).mean()
+        means.index = [col[len('emotion_'):] for col in cols]
+        summary['emotion_means'] = means.sort_values(ascending=False)
+    return summary
+
+def format_results_table(frame, max_text=100):
+    """Display strings for a results table; formatting happens only here, at render time"""
+    text = frame['text'].astype(str)
+    table = pd.DataFrame({'Tweet': text.where(text.str.len() <= max_text, text.str.slice(0, max_text) + '...')})
+    if 'sarcasm_label' in frame:
+        table['Sarcasm'] = frame['sarcasm_label'].astype(str)
+        table['Confidence'] = (frame['confidence'] * 100).map('{:.1f}%'.format)
+    if 'top_emotion' in frame:
+        labels = frame['top_emotion'].astype(str)
+        table['Top Emotion'] = labels.map(get_emotion_emoji) + ' ' + labels
+        table['Emotion Score'] = (frame['top_emotion_score'] * 100).map('{:.1f}%'.format)
+    if 'vader_compound' in frame:
+        table['VADER'] = frame['vader_compound'].map('{:.3f}'.format)
+    return table
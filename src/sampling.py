@@ -0,0 +1,150 @@
+"""Sampling over datasets too large to load into memory.
+
+Stratified reservoir samples take one streaming pass over the projected
+columns. For uniform random draws, CSVs get a row-offset index (one
+uint64 per record, memory-mapped) and Parquet files are read only at the
+row groups holding the chosen rows, so a k-row draw costs O(k) reads.
+"""
+import csv
+import hashlib
+import io
+import os
+import numpy as np
+import pandas as pd
+from . import config
+from .datasets import file_fingerprint, is_parquet, iter_dataset_batches, parquet_cache_path
+
+def _reservoir_update(reservoir, seen, values, k, rng):
+    """Feed a batch of values through Algorithm R; returns the new seen count"""
+    values = list(values)
+    fill = min(max(k - len(reservoir), 0), len(values))
+    reservoir.extend(values[:fill])
+    rest = values[fill:]
+    if rest:
+        positions = np.arange(seen + fill, seen + fill + len(rest))
+        slots = (rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+        for i in np.flatnonzero(slots < k):
+            reservoir[slots[i]] = rest[i]
+    return seen + len(values)
+
+def source_path(path):
+    """Readable columnar path for streaming: the file itself or an existing Parquet conversion"""
+    if not is_parquet(path):
+        cached = parquet_cache_path(path)
+        if os.path.exists(cached):
+            return cached
+    return path
+
+def source_columns(path):
+    """Column names of ``source_path(path)``; a CSV only has its header read, never converted"""
+    path = source_path(path)
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path, memory_map=True).schema_arrow.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+def stratified_sample(path, text_col, label_col, k_per_stratum, seed=None, batch_size=65536):
+    """Up to ``k_per_stratum`` uniform texts for every value of ``label_col``, in one pass"""
+    rng = np.random.default_rng(seed)
+    reservoirs = {}
+    seen = {}
+    path = source_path(path)
+    if is_parquet(path):
+        batches = iter_dataset_batches(path, [text_col, label_col], batch_size)
+    else:
+        # Stream the CSV itself rather than converting it to Parquet first
+        batches = pd.read_csv(path, usecols=[text_col, label_col], chunksize=batch_size)
+    for batch in batches:
+        batch = batch.dropna(subset=[text_col])
+        for label, group in batch.groupby(label_col, sort=False, observed=True):
+            reservoirs.setdefault(label, [])
+            seen[label] = _reservoir_update(reservoirs[label], seen.get(label, 0), group[text_col], k_per_stratum, rng)
+    return reservoirs
+
+def row_index_path(csv_path):
+    digest = hashlib.sha256(file_fingerprint(csv_path).encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(config.CACHE_DIR, 'row_index', f"{name}-{digest}.npy")
+
+def build_row_index(csv_path, block_size=64 * 1024 * 1024):
+    """Byte offset of every CSV record (header excluded), as a memory-mapped uint64 array.
+
+    Newlines inside quoted fields are skipped by tracking quote parity, so
+    multi-line records are handled. Cached by the file's fingerprint.
+    """
+    path = row_index_path(csv_path)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r')
+    
+    offsets = []
+    in_quotes = False
+    position = 0
+    with open(csv_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.cumsum(data == ord('"')) + in_quotes
+            newlines = np.flatnonzero((data == ord('\n')) & (quotes % 2 == 0))
+            offsets.append(newlines.astype(np.uint64) + np.uint64(position + 1))
+            in_quotes = bool(quotes[-1] % 2)
+            position += len(block)
+    
+    offsets = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.uint64)
+    offsets = offsets[offsets < position]  # a trailing newline starts no record
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path + '.tmp.npy', offsets)
+    os.replace(path + '.tmp.npy', path)
+    return np.load(path, mmap_mode='r')
+
+def read_csv_rows(csv_path, rows, offsets):
+    """Parse selected CSV records by seeking to their offsets"""
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    records = []
+    with open(csv_path, 'rb') as f:
+        for row in rows:
+            start = int(offsets[row])
+            end = int(offsets[row + 1]) if row + 1 < len(offsets) else None
+            f.seek(start)
+            raw = f.read(end - start) if end is not None else f.read()
+            records.append(next(csv.reader(io.StringIO(raw.decode('utf-8')))))
+    return pd.DataFrame(records, columns=header)
+
+def parquet_take(path, rows, columns=None):
+    """Read selected rows of a Parquet file, touching only the row groups that hold them"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    parquet = pq.ParquetFile(path, memory_map=True)
+    bounds = np.cumsum([0] + [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)])
+    rows = np.asarray(rows)
+    groups = np.searchsorted(bounds, rows, side='right') - 1
+    tables = []
+    for group in np.unique(groups):
+        local = rows[groups == group] - bounds[group]
+        tables.append(parquet.read_row_group(int(group), columns=columns).take(pa.array(local)))
+    return pa.concat_tables(tables).to_pandas() if tables else pd.DataFrame(columns=columns)
+
+def row_count(path):
+    """Number of records, from Parquet metadata or the CSV row-offset index"""
+    path = source_path(path)
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path, memory_map=True).metadata.num_rows
+    return len(build_row_index(path))
+
+def take_rows(path, rows, columns=None):
+    """Selected rows (sorted positions) via row-group reads (Parquet) or the row-offset index (CSV)"""
+    path = source_path(path)
+    if is_parquet(path):
+        return parquet_take(path, rows, columns)
+    frame = read_csv_rows(path, rows, build_row_index(path))
+    return frame[columns] if columns else frame
+
+def random_rows(path, k, columns=None, seed=None):
+    """k uniformly random rows via row-group reads (Parquet) or the row-offset index (CSV)"""
+    rng = np.random.default_rng(seed)
+    n_rows = row_count(path)
+    rows = np.sort(rng.choice(n_rows, size=min(k, n_rows), replace=False))
+    frame = take_rows(path, rows, columns)
+    return frame.sample(frac=1, random_state=seed).reset_index(drop=True)
@@ -0,0 +1,70 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatchScheduler:
+    """Process-wide queue that coalesces single-item requests into batches.
+
+    Callers from any thread (i.e. any Streamlit session) ``submit`` one item
+    and get a Future back. A worker thread waits for the first item, then keeps
+    collecting until ``max_batch`` items are queued or ``max_wait`` seconds
+    have passed, runs ``process_batch`` once on the whole batch and resolves
+    each caller's future with its own result.
+    """
+    
+    def __init__(self, process_batch, max_batch=32, max_wait=0.005, name='inference-scheduler'):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+    
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+    
+    def map(self, items):
+        """Submit every item and wait for all results, in order"""
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+    
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_batch(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': self.items / self.batches if self.batches else 0.0,
+                'queued': self._queue.qsize()
+            }
@@ -0,0 +1,170 @@
+"""Bulk scoring of tweet archives from the command line.
+
+    python -m src.score tweets.csv scored.parquet --workers 8 --batch-size 64
+
+Reads CSV, JSONL or Parquet in chunks, shards the chunks across worker
+processes that each load the models once, and writes the sarcasm
+probabilities, the full emotion vector and the VADER scores per row.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+import pandas as pd
+from . import config
+from .dedup import deduplicate
+from .results import records_frame, result_columns, result_record
+from .utils import find_text_column
+
+_models = None
+_columns = None
+
+def input_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    return 'csv'
+
+def read_columns(path):
+    """Column names of an input file, without reading its rows"""
+    fmt = input_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+    if fmt == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            return list(json.loads(f.readline()).keys())
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+def iter_chunks(path, text_col, chunk_size):
+    """Yield DataFrames of at most chunk_size rows holding only the text column"""
+    fmt = input_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=[text_col]):
+            yield batch.to_pandas()
+    elif fmt == 'jsonl':
+        for chunk in pd.read_json(path, lines=True, chunksize=chunk_size):
+            yield chunk[[text_col]]
+    else:
+        yield from pd.read_csv(path, usecols=[text_col], chunksize=chunk_size)
+
+def init_worker(threads):
+    """Load the models once per worker process"""
+    global _models, _columns
+    import torch
+    from .models import emotion_labels, load_models
+    if threads:
+        torch.set_num_threads(threads)
+    _models = load_models()
+    _columns = result_columns(emotion_labels(_models))
+
+def score_texts(texts, models, batch_size=32):
+    """Score texts into flat numeric records (no caching, no UI)"""
+    from .models import predict_sarcasm_batch, predict_emotion_batch, get_vader_sentiment
+    if config.DEDUPE == 'off':
+        unique_texts, index = texts, range(len(texts))
+    else:
+        unique_texts, index = deduplicate(texts, config.DEDUPE_LOWERCASE, near_duplicates=config.DEDUPE == 'near')
+    sarcasm = predict_sarcasm_batch(unique_texts, models['sarcasm_tokenizer'], models['sarcasm_model'], batch_size)
+    emotions = predict_emotion_batch(unique_texts, models['emotion_classifier'], batch_size)
+    
+    records = [
+        result_record({
+            'sarcasm': sarcasm_result,
+            'emotions': emotion_results,
+            'vader': get_vader_sentiment(text, models['vader'])
+        })
+        for text, sarcasm_result, emotion_results in zip(unique_texts, sarcasm, emotions)
+    ]
+    return [records[i] for i in index]
+
+def score_chunk(args):
+    start, texts, batch_size = args
+    frame = records_frame(score_texts(texts, _models, batch_size), _columns)
+    frame.insert(0, 'row', range(start, start + len(texts)))
+    return frame
+
+class ResultWriter:
+    """Append scored chunks to a CSV, JSONL or Parquet output file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.format = input_format(path)
+        self._parquet = None
+        self._started = False
+    
+    def write(self, frame):
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        elif self.format == 'jsonl':
+            with open(self.path, 'a' if self._started else 'w', encoding='utf-8') as f:
+                frame.to_json(f, orient='records', lines=True)
+        else:
+            frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+    
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+def report_progress(rows, started):
+    elapsed = time.perf_counter() - started
+    print(f"\r{rows:,} rows • {rows / elapsed:,.1f} rows/s • {elapsed:,.0f}s", end='', file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score tweets for sarcasm, emotions and VADER sentiment")
+    parser.add_argument('input', help="CSV, JSONL or Parquet file")
+    parser.add_argument('output', help="Output file; format follows the extension (.csv, .jsonl, .parquet)")
+    parser.add_argument('--text-column', help="Text column (detected like the app does if omitted)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 4))
+    parser.add_argument('--threads-per-worker', type=int, default=0, help="torch intra-op threads per worker (0 = default)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--chunk-size', type=int, default=2048, help="Rows per task handed to a worker")
+    args = parser.parse_args(argv)
+    
+    text_col = args.text_column or find_text_column(read_columns(args.input))
+    if text_col is None:
+        parser.error("no text column found; pass --text-column")
+    
+    def tasks():
+        start = 0
+        for chunk in iter_chunks(args.input, text_col, args.chunk_size):
+            texts = chunk[text_col].fillna('').astype(str).tolist()
+            yield start, texts, args.batch_size
+            start += len(texts)
+    
+    writer = ResultWriter(args.output)
+    rows = 0
+    started = time.perf_counter()
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers, initializer=init_worker, initargs=(args.threads_per_worker,)) as pool:
+        # Bounded window of in-flight chunks keeps memory flat and output in input order
+        pending = deque()
+        for task in tasks():
+            pending.append(pool.apply_async(score_chunk, (task,)))
+            while len(pending) >= 2 * args.workers or (pending and pending[0].ready()):
+                frame = pending.popleft().get()
+                writer.write(frame)
+                rows += len(frame)
+                report_progress(rows, started)
+        while pending:
+            frame = pending.popleft().get()
+            writer.write(frame)
+            rows += len(frame)
+            report_progress(rows, started)
+    writer.close()
+    print(f"\n✅ Scored {rows:,} rows into {args.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import glob
+import os
+import time
+import pandas as pd
+from . import config
+from .models import analyze_batch, emotion_labels, ALL_COMPONENTS
+from .results import records_frame, result_columns, result_record
+
+def prune_stream_results(directory, max_age_hours=None):
+    """Delete streamed result files not written to for ``max_age_hours`` (default from config)"""
+    max_age_hours = config.STREAM_RESULT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    cutoff = time.time() - max_age_hours * 3600
+    for path in glob.glob(os.path.join(directory, '*.csv')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def analyze_csv_stream(source, text_col, models, output_path, chunk_size=1024, batch_size=32,
+                       components=ALL_COMPONENTS, total_bytes=None):
+    """Analyze a CSV chunk by chunk, appending scored rows to ``output_path``.
+
+    Only the text column is parsed and at most one chunk is held in memory.
+    Yields a progress dict after each chunk with rows done, rows/s and, when
+    ``total_bytes`` is known, the fraction of input read and an ETA.
+    """
+    started = time.perf_counter()
+    rows = 0
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    # Every chunk uses the same columns as the header written by the first one
+    columns = result_columns(emotion_labels(models) if 'emotion' in components else [], components)
+    
+    for chunk in pd.read_csv(source, usecols=[text_col], chunksize=chunk_size):
+        texts = chunk[text_col].fillna('').astype(str).tolist()
+        results = analyze_batch(texts, models, batch_size, components, cache=False)
+        
+        frame = records_frame([result_record(result) for result in results], columns)
+        frame.insert(0, 'text', texts)
+        frame.insert(0, 'row', range(rows, rows + len(texts)))
+        frame.to_csv(output_path, mode='a' if rows else 'w', header=not rows, index=False)
+        rows += len(texts)
+        
+        elapsed = time.perf_counter() - started
+        progress = {'rows': rows, 'elapsed': elapsed, 'rows_per_sec': rows / elapsed if elapsed else 0.0,
+                    'fraction': None, 'eta': None, 'texts': texts, 'results': results}
+        if total_bytes and hasattr(source, 'tell'):
+            fraction = min(source.tell() / total_bytes, 1.0)
+            progress['fraction'] = fraction
+            progress['eta'] = elapsed * (1 - fraction) / fraction if fraction else None
+        yield progress
@@ -0,0 +1,150 @@
+"""Pre-tokenized dataset text as memory-mapped token-id arrays.
+
+One pass tokenizes the text column with the sarcasm tokenizer (same settings
+as inference: truncation at 512 tokens, special tokens included) and writes,
+under ``<CACHE_DIR>/tokens/<dataset>-<digest>/``:
+
+- ``ids.bin``: every row's token ids back to back (uint16 when the vocabulary fits)
+- ``offsets.npy``: int64 start of each row in ``ids.bin``, plus the end
+- ``lengths.npy``: uint16 token count per row
+
+The directory is keyed by the dataset fingerprint, the sarcasm model's hub
+revision and the tokenizer's class, vocabulary size and the transformers
+version, so a changed file, model revision or tokenizer gets a fresh cache. Row slices are views into the memory map, so
+batched inference reads token ids without re-tokenizing or copying.
+Build with ``python -m src.token_cache``.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+from . import config
+from .datasets import dataset_columns, file_fingerprint, find_dataset_path, iter_dataset_batches
+from .utils import find_text_column
+
+MAX_LENGTH = 512
+
+def tokenizer_version(tokenizer, model_id):
+    """Identity of a tokenizer's output: model name and revision, class, vocabulary size and library version
+
+    ``model_id`` is ``models['model_ids']['sarcasm']``; a new revision can
+    change merges without changing the vocabulary size. The backend suffix is
+    dropped because every backend shares the tokenizer.
+    """
+    import transformers
+    revision = model_id.split('+')[0]
+    return f"{revision}:{type(tokenizer).__name__}:{len(tokenizer)}:{transformers.__version__}"
+
+def token_cache_dir(dataset_path, text_col, tokenizer, model_id):
+    key = f"{file_fingerprint(dataset_path)}:{text_col}:{tokenizer_version(tokenizer, model_id)}:{MAX_LENGTH}"
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(dataset_path))[0]
+    return os.path.join(config.CACHE_DIR, 'tokens', f"{name}-{digest}")
+
+class TokenCache:
+    """Token ids of every dataset row, read from memory-mapped arrays"""
+    
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self.offsets = np.load(os.path.join(directory, 'offsets.npy'), mmap_mode='r')
+        self.lengths = np.load(os.path.join(directory, 'lengths.npy'), mmap_mode='r')
+        total = int(self.offsets[-1]) if len(self.offsets) else 0
+        self.ids = np.memmap(os.path.join(directory, 'ids.bin'), dtype=manifest['dtype'], mode='r', shape=(total,)) if total else np.empty(0, dtype=manifest['dtype'])
+    
+    def __len__(self):
+        return len(self.lengths)
+    
+    @classmethod
+    def load(cls, dataset_path, text_col, tokenizer, model_id):
+        """The cache for this dataset version and tokenizer, or None if it has not been built"""
+        directory = token_cache_dir(dataset_path, text_col, tokenizer, model_id)
+        path = os.path.join(directory, 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return cls(directory, json.load(f))
+    
+    @classmethod
+    def build(cls, dataset_path, text_col, tokenizer, model_id, batch_size=16384, progress=None):
+        """Tokenize the text column in one streaming pass and write the arrays"""
+        directory = token_cache_dir(dataset_path, text_col, tokenizer, model_id)
+        os.makedirs(directory, exist_ok=True)
+        dtype = np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max + 1 else np.uint32
+        lengths = []
+        with open(os.path.join(directory, 'ids.bin'), 'wb') as f:
+            for batch in iter_dataset_batches(dataset_path, [text_col], batch_size):
+                texts = batch[text_col].fillna('').astype(str).tolist()
+                encoded = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)['input_ids']
+                batch_lengths = np.fromiter(map(len, encoded), dtype=np.uint16, count=len(encoded))
+                if len(encoded):
+                    f.write(np.fromiter((i for ids in encoded for i in ids), dtype=dtype, count=int(batch_lengths.sum(dtype=np.int64))).tobytes())
+                lengths.append(batch_lengths)
+                if progress:
+                    progress(sum(map(len, lengths)))
+        
+        lengths = np.concatenate(lengths) if lengths else np.empty(0, dtype=np.uint16)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, dtype=np.int64, out=offsets[1:])
+        np.save(os.path.join(directory, 'lengths.npy'), lengths)
+        np.save(os.path.join(directory, 'offsets.npy'), offsets)
+        manifest = {'dtype': np.dtype(dtype).name, 'rows': len(lengths), 'tokenizer': tokenizer_version(tokenizer, model_id)}
+        # The manifest is written last and marks a complete cache
+        with open(os.path.join(directory, 'manifest.json.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(os.path.join(directory, 'manifest.json.tmp'), os.path.join(directory, 'manifest.json'))
+        return cls(directory, manifest)
+    
+    @classmethod
+    def ensure(cls, dataset_path, text_col, tokenizer, model_id):
+        return cls.load(dataset_path, text_col, tokenizer, model_id) or cls.build(dataset_path, text_col, tokenizer, model_id)
+    
+    def row_ids(self, row):
+        """Token ids of one row (a view into the memory map)"""
+        return self.ids[self.offsets[row]:self.offsets[row + 1]]
+    
+    def rows(self, rows):
+        """Token id views for the given rows, in order"""
+        return [self.ids[self.offsets[row]:self.offsets[row + 1]] for row in rows]
+    
+    def range(self, start, end):
+        """Token id views for rows ``start`` to ``end``"""
+        offsets = self.offsets[start:end + 1]
+        return [self.ids[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+def dataset_token_cache(models, dataset_path, text_col, build=True):
+    """Token cache for a dataset and the sarcasm tokenizer (None when disabled, or not built and ``build`` is off)"""
+    if not config.TOKEN_CACHE:
+        return None
+    tokenizer = models['sarcasm_tokenizer']
+    model_id = models['model_ids']['sarcasm']
+    if build:
+        return TokenCache.ensure(dataset_path, text_col, tokenizer, model_id)
+    return TokenCache.load(dataset_path, text_col, tokenizer, model_id)
+
+def main():
+    import argparse
+    from .models import load_models
+    
+    parser = argparse.ArgumentParser(description="Pre-tokenize the dataset with the sarcasm tokenizer")
+    parser.add_argument('dataset', nargs='?', help="dataset path (default: the app's dataset)")
+    parser.add_argument('--text-column', help="text column (default: auto-detect)")
+    args = parser.parse_args()
+    
+    dataset_path = args.dataset or find_dataset_path()
+    text_col = args.text_column or find_text_column(dataset_columns(dataset_path))
+    models = load_models()
+    tokenizer = models['sarcasm_tokenizer']
+    model_id = models['model_ids']['sarcasm']
+    start = time.time()
+    
+    def report(rows):
+        print(f"{rows:,} rows tokenized ({rows / max(time.time() - start, 1e-9):.0f} rows/s)", file=sys.stderr)
+    
+    cache = TokenCache.load(dataset_path, text_col, tokenizer, model_id) or TokenCache.build(dataset_path, text_col, tokenizer, model_id, progress=report)
+    print(f"Token cache ready: {len(cache):,} rows, {len(cache.ids):,} tokens in {cache.directory}")
+
+if __name__ == '__main__':
+    main()
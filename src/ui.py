@@ -0,0 +1,67 @@
+import streamlit as st
+from .datasets import file_fingerprint
+from .embeddings import EmbeddingStore
+from .jobs import JobManager
+from .keyword_index import KeywordIndex
+from .models import load_models, result_error
+from .prediction_index import load_index, load_manifest
+
+# Streamlit adapter over the headless inference core in src.models
+
+@st.cache_resource
+def get_models():
+    """Shared models for all sessions, cached by Streamlit"""
+    try:
+        return load_models()
+    except Exception as e:
+        st.error(f"❌ Error loading models: {str(e)}")
+        return None
+
+@st.cache_resource
+def get_job_manager():
+    """Process-wide background job manager; resumes unfinished jobs on first use"""
+    return JobManager(get_models())
+
+@st.cache_resource(max_entries=2)
+def _load_prediction_index(dataset_path, updated):
+    return load_index(dataset_path)
+
+def get_prediction_index(dataset_path):
+    """Manifest and shared index frame for a dataset, reloaded only after the index changes"""
+    manifest = load_manifest(dataset_path)
+    if manifest is None:
+        return None, None
+    return manifest, _load_prediction_index(dataset_path, manifest['updated'])
+
+@st.cache_resource(max_entries=2)
+def _load_keyword_index(dataset_path, text_col, fingerprint):
+    return KeywordIndex.ensure(dataset_path, text_col)
+
+def get_keyword_index(dataset_path, text_col):
+    """Shared keyword index for the current version of a dataset, built on first use"""
+    return _load_keyword_index(dataset_path, text_col, file_fingerprint(dataset_path))
+
+@st.cache_resource(max_entries=2)
+def _load_embedding_store(dataset_path, model_id, fingerprint):
+    return EmbeddingStore.open(dataset_path, model_id)
+
+def get_embedding_store(dataset_path, model_id):
+    """Shared embedding store for the current dataset version, or None until it has been built"""
+    store = _load_embedding_store(dataset_path, model_id, file_fingerprint(dataset_path))
+    if store is None:
+        # Not built yet; don't keep the miss cached
+        _load_embedding_store.clear()
+    return store
+
+def report_errors(results):
+    """Show prediction errors carried in analysis results (one or many)"""
+    if isinstance(results, dict):
+        results = [results]
+    errors = {
+        error
+        for result in results
+        for error in (result_error(result['sarcasm']), result_error(result['emotions']))
+        if error
+    }
+    for error in errors:
+        st.error(f"Prediction error: {error}")
@@ -1,6 +1,8 @@
 import pandas as pd
 import os
 import random
+from . import config
+from .datasets import find_dataset_path, dataset_columns, dataset_cache
 
 def get_emotion_emoji(emotion):
     """Map emotions to emojis"""
@@ -15,42 +17,46 @@ def get_emotion_emoji(emotion):
     }
     return emoji_map.get(emotion.lower(), '🎭')
 
-def load_dataset_tweets():
-    """Load tweets from dataset with better error handling"""
+def load_dataset_tweets(columns=None, text_only=False):
+    """Load tweets from dataset with better error handling
+
+    Parquet datasets are preferred and CSVs are read through a cached
+    Parquet conversion. Frames come from a process-wide cache that reloads
+    when the file changes; pass ``columns`` (or ``text_only``) to load only
+    what is needed. The returned frame is shared and must not be modified.
+    """
     try:
-        possible_paths = [
-            'data/eng_dataset.csv',
-            'data/preprocessed.csv',
-            'eng_dataset.csv',
-            'preprocessed.csv',
-            '../data/eng_dataset.csv',
-            '../data/preprocessed.csv'
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                df = pd.read_csv(path)
-                return df
-        
-        return None
+        path = find_dataset_path()
+        if path is None:
+            return None
+        text_col = find_text_column(dataset_columns(path))
+        if text_only:
+            if text_col is None:
+                return None
+            columns = [text_col]
+        return dataset_cache.get(path, columns, text_col)
         
     except Exception as e:
         print(f"❌ Error loading dataset: {str(e)}")
         return None
 
+TEXT_COLUMNS = ['text', 'tweet', 'content', 'message', 'Text', 'Tweet', 'Content', 'Message']
+
+def find_text_column(columns):
+    """Return the first known text column name present in columns, or None"""
+    for col in TEXT_COLUMNS:
+        if col in columns:
+            return col
+    return None
+
 def generate_random_tweets(df, n=10):
     """Generate random tweets from dataset"""
     if df is not None and len(df) > 0:
-        possible_cols = ['text', 'tweet', 'content', 'message', 'Text', 'Tweet', 'Content', 'Message']
-        text_col = None
-        
-        for col in possible_cols:
-            if col in df.columns:
-                text_col = col
-                break
+        text_col = find_text_column(df.columns)
         
         if text_col:
-            tweets = df[text_col].dropna().astype(str).sample(min(n, len(df))).tolist()
+            texts = df[text_col].dropna()
+            tweets = texts.sample(min(n, len(texts))).astype(str).tolist()
             return tweets
     
     # Fallback sample tweets
@@ -62,3 +68,45 @@ def generate_random_tweets(df, n=10):
         "This weather is absolutely perfect for staying indoors all day.",
     ]
     return fallback_tweets[:n]
+
+def sample_dataset_tweets(n=10, seed=None):
+    """Random tweets from the configured dataset without loading it when it is large
+
+    Small datasets are sampled from the shared in-memory cache; larger ones
+    through the on-disk sampler, which reads only the chosen rows.
+    """
+    try:
+        path = find_dataset_path()
+        if path is not None and os.path.getsize(path) > config.SAMPLE_IN_MEMORY_BYTES:
+            from .sampling import random_rows, source_columns
+            # Only the header is read, so a large CSV is sampled through its
+            # row-offset index rather than converted to Parquet first
+            text_col = find_text_column(source_columns(path))
+            if text_col:
+                tweets = random_rows(path, n, [text_col], seed)[text_col].dropna().astype(str).tolist()
+                if tweets:
+                    return tweets
+    except Exception as e:
+        print(f"❌ Error sampling dataset: {str(e)}")
+    return generate_random_tweets(load_dataset_tweets(text_only=True), n)
+
+def sample_dataset_strata(n_per_stratum, stratify_by, text_col=None, seed=None):
+    """Up to ``n_per_stratum`` random tweets for every value of ``stratify_by``
+
+    Large datasets are sampled with one streaming reservoir pass over the two
+    columns instead of a groupby over the loaded frame.
+    """
+    path = find_dataset_path()
+    if path is None:
+        return []
+    if os.path.getsize(path) > config.SAMPLE_IN_MEMORY_BYTES:
+        from .sampling import source_columns, stratified_sample
+        text_col = text_col or find_text_column(source_columns(path))
+        strata = stratified_sample(path, text_col, stratify_by, n_per_stratum, seed)
+        return [str(text) for texts in strata.values() for text in texts]
+    text_col = text_col or find_text_column(dataset_columns(path))
+    df = load_dataset_tweets()
+    texts = df.dropna(subset=[text_col]).groupby(stratify_by, observed=True, group_keys=False).apply(
+        lambda group: group.sample(min(len(group), n_per_stratum), random_state=seed)
+    )
+    return texts[text_col].astype(str).tolist()